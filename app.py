@@ -1,64 +1,176 @@
 import os
 import re
 import time
-import shutil
-import pandas as pd
-from langchain_community.llms import LlamaCpp
+import threading
+from functools import partial
 from datetime import date
+from field_rules import attach_cnic, extract_rule_fields, find_cnic
+from extraction_schema import FIELD_NAMES, build_json_instruction, parse_json_response
+from section_segmenter import segment_sections
+from pdf_text import extract_pdf_text
+from context_budget import llama_token_counter, pack_context
+from field_specs import field_answer, json_answer_budget, llama_grammar, llama_json_grammar, output_limits
+from model_cascade import ModelCascade
+from prefix_cache import PrefixCache
+from processor_base import TEXT_BACKENDS, BaseCVProcessor
 
 today = date.today()
 print("Today's date is:", today)
 
-
-class CVProcessor:
-    def __init__(self, cv_folder="cvs", archive_folder="archive", output_file="output.xlsx", interval=30):
-        self.cv_folder = cv_folder
-        self.archive_folder = archive_folder
-        self.output_file = output_file
-        self.interval = interval
-        self.llm = self.load_llama_model()
-
-        os.makedirs(self.cv_folder, exist_ok=True)
-        os.makedirs(self.archive_folder, exist_ok=True)
-
-        if not os.path.exists(self.output_file):
-            self.initialize_excel()
-
-    def load_llama_model(self):
+MODEL_PATH = r"C:/Users/thegh/Python Projects/Ai Models/Meta-Llama-3.1-8B-Instruct-Q4_K_M.gguf"
+# Bump whenever the prompts change so cached field answers are not reused
+PROMPT_VERSION = 4
+
+# Label used in the per-field question for each column
+FIELD_PROMPTS = {
+    "Candidate Name & CNIC No": "Candidate Name & CNIC",
+    "DOB": "DOB",
+    "SSC Field / %age": "SSC Field / %age",
+    "HSSC Field / %age": "HSSC Field / %age",
+    "Graduation Field / CGPA / Passing Year": "Graduation Field / CGPA / Passing Year",
+    "Courses": "Courses",
+    "Experience Detail with Dates": "Experience Detail with Dates",
+    "Total Experience": "Total Experience",
+    "Contact Number": "Contact Number",
+    "Email": "Email",
+    "Address": "Address",
+}
+
+# Llama 3 end-of-turn markers, in case the chat tokens are not mapped to EOS
+LLAMA_STOPS = ["<|eot_id|>", "<|start_header_id|>"]
+
+
+def extract_text_from_pdf(file_path):
+    # Whole document; the pipeline streams pages through extract_cv_text with a budget instead
+    return extract_pdf_text(file_path, TEXT_BACKENDS)
+
+
+class CVProcessor(BaseCVProcessor):
+    # Inbox, pipeline, store and archive handling live in processor_base; this class only runs the model
+    def __init__(self, use_prefix_cache=True, small_model_path=None, **options):
+        # constrain_output decodes fixed-shape columns (DOB, Email, ...) and the single-call JSON under a grammar
+        super().__init__(os.path.basename(MODEL_PATH), PROMPT_VERSION, **options)
+        if small_model_path:
+            self.model_key += f"|cascade-{os.path.basename(small_model_path)}"
+        # A single llama.cpp context: extra LLM workers only overlap the parse and write stages
+        self.llm_lock = threading.Lock()
+        # The models are loaded by load_models() when the first CV needs them
+        self.use_prefix_cache = use_prefix_cache
+        self.small_model_path = small_model_path
+        self.model_lock = threading.Lock()
+        self.llm = self.token_counter = self.prefix_cache = self.tiers = None
+        self.cascade = ModelCascade(2 if small_model_path else 1, self.metrics)
+    def load_models(self):
+        # Deferred to the first CV that needs the model, so empty runs and health checks start fast
+        with self.model_lock:
+            if self.tiers is not None:
+                return
+            self.llm = self.load_llama_model()
+            self.token_counter = self.load_token_counter()
+            # Evaluate the shared resume prompt once per CV and branch every field question from it
+            self.prefix_cache = PrefixCache(self.llm.client) if self.use_prefix_cache else None
+            # (model, prefix cache) per cascade tier, cheapest first. With small_model_path (a small Llama 3
+            # GGUF: same chat format and tokenizer) it answers every field first and a field only goes to
+            # the main model when its answer fails a cheap validator (see model_cascade)
+            tiers = [(self.llm, self.prefix_cache)]
+            if self.small_model_path:
+                small_llm = self.load_llama_model(self.small_model_path)
+                tiers.insert(0, (small_llm, PrefixCache(small_llm.client) if self.use_prefix_cache else None))
+            self.tiers = tiers
+
+    REQUIRED_MODULES = BaseCVProcessor.REQUIRED_MODULES + ("langchain_community", "llama_cpp")
+
+    @classmethod
+    def model_status(cls, small_model_path=None, **options):
+        # Health check without loading anything or building a processor: (ok, message)
+        missing = [path for path in (MODEL_PATH, small_model_path) if path and not os.path.isfile(path)]
+        if missing:
+            return False, "model file not found: " + ", ".join(missing)
+        return True, "model file present: " + os.path.basename(MODEL_PATH)
+
+    def load_llama_model(self, model_path=MODEL_PATH):
+        from langchain_community.llms import LlamaCpp
         return LlamaCpp(
-            model_path=r"C:/Users/thegh/Python Projects/Ai Models/Meta-Llama-3.1-8B-Instruct-Q4_K_M.gguf",
+            model_path=model_path,
             n_gpu_layers=10,
-            n_ctx=5000,
+            n_ctx=self.n_ctx,
             f16_kv=True,
-            max_tokens=5000,
+            max_tokens=self.max_new_tokens,
             temperature=0.1,
             streaming=True,
             verbose=True
         )
 
-    def initialize_excel(self):
-        columns = ["Sr No", "Candidate Name & CNIC No", "Father's Name", "DOB", "SSC Field / %age",
-                   "HSSC Field / %age", "Graduation Field / CGPA / Passing Year", "Courses",
-                   "Experience Detail with Dates", "Total Experience", "Contact Number",
-                   "Email", "Address"]
-        pd.DataFrame(columns=columns).to_excel(self.output_file, index=False)
-
-    def extract_text_from_pdf(self, file_path):
-        from PyPDF2 import PdfReader
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() or ""
-        return text
-
-    def extract_info_with_llama(self, text):
-        # Rough token count estimate (1 token ~ 4 characters)
-        max_tokens = 4900  # keep below limit for prompt + output
-        token_estimate = len(text) // 4
-
-        if token_estimate > max_tokens:
-            print("⛔ Resume too long. Truncating text to fit within context window.")
-            text = text[:max_tokens * 4]  # truncate safely
+    def load_token_counter(self):
+        # The model's own tokenizer, so packing is exact
+        return llama_token_counter(self.llm.client)
+
+    def extract_info_with_llama(self, text, answered=None, on_answer=None):
+        # answered: LLM answers checkpointed by an earlier, interrupted run; on_answer(field, answer)
+        # is called as each new one arrives so it can be checkpointed too
+        self.load_models()
+        # Deterministic fast path for the most structured columns, run on the untruncated text
+        output = extract_rule_fields(text)
+        cnic = find_cnic(text)
+        if output:
+            print(f"⚡ Matched by rules: {', '.join(output)}")
+        for field in output:
+            self.metrics.field(field, 0.0, source="rules")
+
+        output.update(answered or {})
+        on_answer = on_answer or (lambda field, answer: None)
+
+        sections = segment_sections(text)
+        pending = [field for field in FIELD_NAMES if field not in output]
+        # Total Experience is computed from the experience dates below, not asked for in the JSON
+        json_fields = [field for field in pending if field != "Total Experience"]
+        try:
+            # No JSON request when a resumed or near-duplicate CV has nothing left to ask in it
+            if self.extraction_mode == "single_call" and json_fields:
+                initial_prompt = self.build_initial_prompt(
+                    pack_context(text, sections, "single_call", self.resume_tokens, self.token_counter, slice_sections=False))
+                json_question = "\nUser: " + build_json_instruction(json_fields) + " Assistant:"
+                raw = self.invoke_with_prefix(initial_prompt, json_question, "single_call", self.json_generation(json_fields), tier=0)
+                answers, missing = parse_json_response(raw, json_fields)
+                # With a cascade, answers failing validation are re-asked one by one like missing ones
+                for field in self.cascade.failing(answers):
+                    del answers[field]
+                    missing.append(field)
+                pending = missing + [field for field in pending if field == "Total Experience"]
+                output.update(answers)
+                for field, answer in answers.items():
+                    on_answer(field, answer)
+                if pending:
+                    print(f"🔁 Retrying {len(pending)} field(s) one by one: {', '.join(pending)}")
+
+            # Per-field path; in single-call mode only the missing/invalid fields get here.
+            # Fields sharing a resume slice run back to back so each distinct prefix is evaluated once;
+            # Father's Name is asked last because it is derived from the name answer, and Total Experience
+            # follows the experience detail it is computed from.
+            contexts = {field: self.field_context(text, sections, field) for field in pending}
+            order = list(dict.fromkeys(contexts.values()))
+            prompts = {}
+            for field in sorted(pending, key=lambda f: (f == "Father's Name", order.index(contexts[f]),
+                                                        f == "Total Experience")):
+                if field == "Total Experience" and self.computed_experience(output, on_answer):
+                    continue
+                context = contexts[field]
+                if context not in prompts:
+                    prompts[context] = self.build_initial_prompt(context)
+                output[field] = self.cascade.answer(field, partial(self.ask_field, prompts[context], field, output))
+                on_answer(field, output[field])
+        finally:
+            for _, prefix_cache in self.tiers:
+                if prefix_cache is not None:
+                    prefix_cache.clear()
+
+        output["Candidate Name & CNIC No"] = attach_cnic(output["Candidate Name & CNIC No"], cnic)
+        output = {field: output[field] for field in FIELD_NAMES}
+        # print(output)
+        return output
+
+    def build_initial_prompt(self, text):
+        # `text` is already packed to resume_tokens by field_context
         template = f"""
 You are an expert resume extractor. Extract the following structured information from this resume:
 
@@ -101,11 +213,11 @@ Address: ... \n
                             {template}
                             <|eot_id|><|start_header_id|>user<|end_header_id|>
                             """
+        return initial_prompt
 
-        cnic_no_prompt = initial_prompt + "\nUser: " + "Give me only required output 'Candidate Name & CNIC' From the above Resume.(Mention the Answer only)" + " Assistant:"
-        cnic_no_output = self.llm.invoke(cnic_no_prompt)
-
-        initial_general_prompt = f"""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
+    def ask_field(self, initial_prompt, field, answers, tier=-1):
+        if field == "Father's Name":
+            initial_general_prompt = f"""<|begin_of_text|><|start_header_id|>system<|end_header_id|>
 
                                     Cutting Knowledge Date: December 2023
                                     Today Date: {today}
@@ -113,130 +225,63 @@ Address: ... \n
 
                                     <|eot_id|><|start_header_id|>user<|end_header_id|>
                                     """
-        father_name_prompt = initial_general_prompt + "\nUser: " + "Extract the full second name from that name : " + cnic_no_output + " (Mention the Answer only)Assistant:"
-        father_name_output = self.llm.invoke(father_name_prompt)
-
-        dob_prompt = initial_prompt + "\nUser: " + "Give me only required output 'DOB' From the above Resume.(Mention the Answer only)" + " Assistant:"
-        dob_output = self.llm.invoke(dob_prompt)
-
-        ssc_age_prompt = initial_prompt + "\nUser: " + "Give me only required output 'SSC Field / %age' From the above Resume.(Mention the Answer only)" + " Assistant:"
-        ssc_age_output = self.llm.invoke(ssc_age_prompt)
-
-        hssc_age_prompt = initial_prompt + "\nUser: " + "Give me only required output 'HSSC Field / %age' From the above Resume.(Mention the Answer only)" + " Assistant:"
-        hssc_age_output = self.llm.invoke(hssc_age_prompt)
-
-        graduation_prompt = initial_prompt + "\nUser: " + "Give me only required output 'Graduation Field / CGPA / Passing Year' From the above Resume.(Mention the Answer only)" + " Assistant:"
-        graduation_output = self.llm.invoke(graduation_prompt)
-
-        courses_prompt = initial_prompt + "\nUser: " + "Give me only required output 'Courses' From the above Resume.(Mention the Answer only)" + " Assistant:"
-        courses_output = self.llm.invoke(courses_prompt)
-
-        exp_prompt = initial_prompt + "\nUser: " + "Give me only required output 'Experience Detail with Dates' From the above Resume.(Mention the Answer only)" + " Assistant:"
-        exp_output = self.llm.invoke(exp_prompt)
-
-        total_exp_prompt = initial_prompt + "\nUser: " + "Give me only required output 'Total Experience' From the above Resume.(Mention the Answer only)" + " Assistant:"
-        total_exp_output = self.llm.invoke(total_exp_prompt)
-
-        contact_no_prompt = initial_prompt + "\nUser: " + "Give me only required output 'Contact Number' From the above Resume.(Mention the Answer only)" + " Assistant:"
-        contact_no_output = self.llm.invoke(contact_no_prompt)
-
-        email_prompt = initial_prompt + "\nUser: " + "Give me only required output 'Email' From the above Resume.(Mention the Answer only)" + " Assistant:"
-        email_output = self.llm.invoke(email_prompt)
-
-        address_prompt = initial_prompt + "\nUser: " + "Give me only required output 'Address' From the above Resume.(Mention the Answer only)" + " Assistant:"
-        address_output = self.llm.invoke(address_prompt)
-
-        output = {
-            "Candidate Name & CNIC No": cnic_no_output,
-            "Father's Name": father_name_output,
-            "DOB": dob_output,
-            "SSC Field / %age": ssc_age_output,
-            "HSSC Field / %age": hssc_age_output,
-            "Graduation Field / CGPA / Passing Year": graduation_output,
-            "Courses": courses_output,
-            "Experience Detail with Dates": exp_output,
-            "Total Experience": total_exp_output,
-            "Contact Number": contact_no_output,
-            "Email": email_output,
-            "Address": address_output,
-        }
-        # print(output)
-        return output
-
-    def append_to_excel(self, data, sr_no):
-        df = pd.read_excel(self.output_file)
-
-        # Ensure ordered keys
-        ordered_keys = [
-            "Candidate Name & CNIC No",
-            "Father's Name",
-            "DOB",
-            "SSC Field / %age",
-            "HSSC Field / %age",
-            "Graduation Field / CGPA / Passing Year",
-            "Courses",
-            "Experience Detail with Dates",
-            "Total Experience",
-            "Contact Number",
-            "Email",
-            "Address"
-        ]
-
-        # Build ordered row
-        row = {"Sr No": sr_no}
-        for key in ordered_keys:
-            row[key] = data.get(key, "")
-
-        # Append to DataFrame
-        df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-        df.to_excel(self.output_file, index=False)
-        print(f"✅ CV appended for Sr No: {sr_no}")
-
-    # def append_to_excel(self, data, sr_no):
-    #     df = pd.read_excel(self.output_file)
-    #     row = {
-    #         "Sr No": sr_no,
-    #         **data
-    #     }
-    #     df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-    #     df.to_excel(self.output_file, index=False)
-    #     print(f"✅ CV appended for Sr No: {sr_no}")
-
-    def process_new_cvs(self):
-        files = [f for f in os.listdir(self.cv_folder) if f.lower().endswith(".pdf")]
-        archived = set(os.listdir(self.archive_folder))
-
-        if not files:
-            print("📂 No CV files found.")
-            return
+            name = answers.get("Candidate Name & CNIC No", "")
+            prompt = initial_general_prompt + "\nUser: " + "Extract the full second name from that name : " + name + " (Mention the Answer only)Assistant:"
+            start = time.perf_counter()
+            answer = self.tiers[tier][0].invoke(prompt, **self.field_generation(field))
+            self.record_field(field, start, prompt, answer, tier=tier)
+            return field_answer(field, answer)
+        question = "\nUser: " + f"Give me only required output '{FIELD_PROMPTS[field]}' From the above Resume.(Mention the Answer only)" + " Assistant:"
+        return field_answer(field, self.invoke_with_prefix(initial_prompt, question, field, self.field_generation(field), tier))
+
+    def field_generation(self, field):
+        # Per-field token cap and stop strings, plus a grammar for the fixed-shape columns
+        max_tokens, stop = output_limits(field, self.max_new_tokens, LLAMA_STOPS)
+        generation = {"max_tokens": max_tokens, "stop": stop}
+        grammar = llama_grammar(field) if self.constrain_output else None
+        if grammar is not None:
+            generation["grammar"] = grammar
+        return generation
+
+    def json_generation(self, fields):
+        generation = {"max_tokens": json_answer_budget(fields), "stop": list(LLAMA_STOPS)}
+        if self.constrain_output:
+            generation["grammar"] = llama_json_grammar(tuple(fields))
+        return generation
+
+    def invoke_with_prefix(self, prefix, suffix, field, generation, tier=-1):
+        # tier picks the cascade model; -1 is the main model
+        llm, prefix_cache = self.tiers[tier]
+        start = time.perf_counter()
+        if prefix_cache is None:
+            answer = llm.invoke(prefix + suffix, **generation)
+            self.record_field(field, start, prefix + suffix, answer, tier=tier)
+            return answer
+        answer = prefix_cache.complete(
+            prefix, suffix,
+            temperature=llm.temperature,
+            top_p=llm.top_p,
+            top_k=llm.top_k,
+            repeat_penalty=llm.repeat_penalty,
+            **generation,
+        )
+        self.record_field(field, start, prefix + suffix, answer,
+                          prefix_cache.last_usage, prefix_cache.last_hit, tier)
+        return answer
 
-        new_files = [f for f in files if f not in archived]
-        if not new_files:
-            print("🟡 No new CVs found.")
+    def record_field(self, field, start, prompt, answer, usage=None, cache_hit=False, tier=-1):
+        if not self.metrics.enabled:
             return
-
-        try:
-            df = pd.read_excel(self.output_file)
-            current_sr = len(df) + 1
-        except FileNotFoundError:
-            current_sr = 1
-
-        for i, file_name in enumerate(new_files):
-            file_path = os.path.join(self.cv_folder, file_name)
-            print(f"🔍 Processing: {file_name}")
-            text = self.extract_text_from_pdf(file_path)
-            info = self.extract_info_with_llama(text)
-            self.append_to_excel(info, current_sr + i)
-            shutil.move(file_path, os.path.join(self.archive_folder, file_name))
-            print(f"📦 Archived: {file_name}")
-
-    def run(self):
-        print("🚀 CV Processor is now running...")
-        while True:
-            self.process_new_cvs()
-            time.sleep(self.interval)
+        seconds = time.perf_counter() - start
+        if usage:
+            prompt_tokens, generated_tokens = usage.get("prompt_tokens"), usage.get("completion_tokens")
+        else:
+            # Re-tokenising costs a little, so it only happens with metrics on
+            prompt_tokens, generated_tokens = self.llm.get_num_tokens(prompt), self.llm.get_num_tokens(answer)
+        self.metrics.field(field, seconds, prompt_tokens, generated_tokens, cache_hit=cache_hit,
+                           tier=tier % len(self.tiers))
 
 
 if __name__ == "__main__":
-    processor = CVProcessor()
-    processor.run()
\ No newline at end of file
+    from cli import main
+    main(CVProcessor)
@@ -1,106 +1,285 @@
-import os
 import re
 import time
-import shutil
-import pandas as pd
-from langchain_community.chat_models import ChatOllama
-from langchain.schema.messages import SystemMessage, HumanMessage
+import asyncio
+import threading
+from functools import partial
 from datetime import date
+from field_rules import attach_cnic, extract_rule_fields, find_cnic
+from extraction_schema import FIELD_NAMES, answer_schema, build_json_instruction, parse_json_response
+from section_segmenter import segment_sections
+from pdf_text import extract_pdf_text
+from context_budget import TokenCounter, hf_token_counter, pack_context
+from field_specs import field_answer, json_answer_budget, output_limits
+from ollama_async import AsyncOllamaClient, BackgroundLoop
+from model_cascade import ModelCascade
+from processor_base import TEXT_BACKENDS, BaseCVProcessor
 
 today = date.today()
 print("Today's date is:", today)
 
+MODEL_NAME = "gemma3:1b"  # or any other local model you have installed in Ollama
+# Bump whenever the prompts change so cached field answers are not reused
+PROMPT_VERSION = 4
 
-class CVProcessor:
-    def __init__(self, cv_folder="cvs", archive_folder="archive", output_file="output.xlsx", interval=30):
-        self.cv_folder = cv_folder
-        self.archive_folder = archive_folder
-        self.output_file = output_file
-        self.interval = interval
-        self.llm = self.load_llama_model()
+SYSTEM_PROMPT = """
+    You are an expert resume extractor. Extract the following structured information from this resume:
+
+    1. Candidate Name & CNIC
+    2. Father's Name
+    3. Date of Birth (DOB)
+    4. SSC Field / %age
+    5. HSSC Field / %age
+    6. Graduation Field / CGPA / Passing Year
+    7. Courses
+    8. Experience Detail with Dates
+    9. Total Experience (in years and months)
+    10. Contact Number
+    11. Email
+    12. Address
+    """
 
-        os.makedirs(self.cv_folder, exist_ok=True)
-        os.makedirs(self.archive_folder, exist_ok=True)
+# Per-field question for each column
+FIELD_PROMPTS = {
+    "Candidate Name & CNIC No": "Give only 'Candidate Name & SCNIC' ",
+    "Father's Name": "From the Resume above, extract the Father's Name of the candidate",
+    "DOB": "Give only 'Date of Birth (DOB)'",
+    "SSC Field / %age": "Give only 'SSC Field / %age'",
+    "HSSC Field / %age": "Give only 'HSSC Field / %age'",
+    "Graduation Field / CGPA / Passing Year": "Give only 'Graduation Field / CGPA / Passing Year'",
+    "Courses": "Give only 'Courses or CERTIFICATIONS / PROFESSIONAL COURSES '",
+    "Experience Detail with Dates": "Give only '(Experience or Work Experience) Detail with Dates'",
+    "Total Experience": f"Give only 'Total Experience' and now today is {today}",
+    "Contact Number": "Give only 'Contact Number or Phone Number From The First mentioned name in the Resume above'",
+    "Email": "Give only 'Email' From The First mentioned name in the Resume above",
+    "Address": "Give only 'Address or Home' From The First mentioned name in the Resume above",
+}
 
-        if not os.path.exists(self.output_file):
-            self.initialize_excel()
 
-    def load_llama_model(self):
+def extract_text_from_pdf(file_path):
+    # Whole document; the pipeline streams pages through extract_cv_text with a budget instead
+    return extract_pdf_text(file_path, TEXT_BACKENDS)
+
+
+class CVProcessor(BaseCVProcessor):
+    # Inbox, pipeline, store and archive handling live in processor_base; this class only runs the model
+    def __init__(self, async_llm=False, ollama_url="http://localhost:11434", max_in_flight=4, tokenizer_file=None,
+                 escalation_model=None, **options):
+        # num_ctx (n_ctx) stays fixed for the whole run, since a request with a different num_ctx reloads the
+        # model; constrain_output constrains the single-call answer to the JSON schema of the asked fields
+        # (Ollama >= 0.5)
+        super().__init__(MODEL_NAME, PROMPT_VERSION, **options)
+        # Ollama has no tokenize endpoint: use the model's tokenizer.json when given, otherwise a
+        # conservative estimate that is tightened from the prompt_eval_count of each reply
+        self.tokenizer_file = tokenizer_file
+        if escalation_model:
+            self.model_key += f"|cascade-{escalation_model}"
+        # Models per cascade tier, cheapest first. With escalation_model (e.g. "llama3.1:8b") MODEL_NAME
+        # answers every field first and a field only goes to the larger model when its answer fails a
+        # cheap validator (see model_cascade)
+        self.models = [MODEL_NAME] + ([escalation_model] if escalation_model else [])
+        self.cascade = ModelCascade(len(self.models), self.metrics)
+        # Optional asyncio path: field queries go out concurrently through one pooled client per model,
+        # capped at max_in_flight requests; with llm_workers > 1 the queries of several CVs share that cap
+        self.async_llm = async_llm
+        self.ollama_url = ollama_url
+        self.max_in_flight = max_in_flight
+        # The clients are created by load_models() when the first CV needs them
+        self.model_lock = threading.Lock()
+        self.llm = self.llm_tiers = self.token_counter = self.ollama = None
+    def load_models(self):
+        # Deferred to the first CV that needs the model, so empty runs and health checks start fast
+        with self.model_lock:
+            if self.llm_tiers is not None:
+                return
+            self.token_counter = hf_token_counter(self.tokenizer_file) or TokenCounter()
+            self.llm = self.load_llama_model()
+            self.llm_tiers = [self.llm] + [self.load_llama_model(model) for model in self.models[1:]]
+            if self.async_llm:
+                self.ollama_tiers = [
+                    AsyncOllamaClient(model, self.ollama_url, max_in_flight=self.max_in_flight,
+                                      options={"temperature": 0.1, "num_ctx": self.n_ctx,
+                                               "num_predict": self.max_new_tokens})
+                    for model in self.models
+                ]
+                self.ollama_loop = BackgroundLoop()
+                self.ollama = self.ollama_tiers[0]
+
+    def close(self):
+        # The pooled Ollama sessions are closed on their own loop before it stops
+        if self.ollama is not None:
+            for client in self.ollama_tiers:
+                self.ollama_loop.run(client.close())
+            self.ollama_loop.stop()
+            self.ollama = self.llm_tiers = None
+        super().close()
+
+    REQUIRED_MODULES = BaseCVProcessor.REQUIRED_MODULES + ("langchain_community",)
+
+    @classmethod
+    def model_status(cls, ollama_url="http://localhost:11434", escalation_model=None, **options):
+        # Health check without loading anything or building a processor: (ok, message) from Ollama's
+        # list of pulled models
+        import json
+        import urllib.request
+        models = [MODEL_NAME] + ([escalation_model] if escalation_model else [])
+        try:
+            with urllib.request.urlopen(ollama_url.rstrip("/") + "/api/tags", timeout=3) as response:
+                names = {model["name"] for model in json.load(response).get("models", [])}
+        except (OSError, ValueError) as error:
+            return False, f"Ollama not reachable at {ollama_url}: {error}"
+        missing = [model for model in models if model not in names and f"{model}:latest" not in names]
+        if missing:
+            return False, "not pulled in Ollama: " + ", ".join(missing)
+        return True, "Ollama serves " + ", ".join(models)
+
+    def load_llama_model(self, model=MODEL_NAME):
+        from langchain_community.chat_models import ChatOllama
         return ChatOllama(
-            model="gemma3:1b",  # or any other local model you have installed in Ollama
+            model=model,
             temperature=0.1,
-            max_tokens=30000,
+            num_ctx=self.n_ctx,
+            num_predict=self.max_new_tokens,
             #verbose=True
         )
 
-    def initialize_excel(self):
-        columns = ["Sr No", "Candidate Name & CNIC No", "Father's Name", "DOB", "SSC Field / %age",
-                   "HSSC Field / %age", "Graduation Field / CGPA / Passing Year", "Courses",
-                   "Experience Detail with Dates", "Total Experience", "Contact Number",
-                   "Email", "Address"]
-        pd.DataFrame(columns=columns).to_excel(self.output_file, index=False)
-
-    # def extract_text_from_pdf(self, file_path):
-    #     from PyPDF2 import PdfReader
-    #     reader = PdfReader(file_path)
-    #     text = ""
-    #     for page in reader.pages:
-    #         text += page.extract_text() or ""
-    #     return text
-    def extract_text_from_pdf(self, file_path):
-        import pdfplumber
-        text = ""
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-        return text
-    def extract_info_with_llama(self, text):
+    def extract_info_with_llama(self, text, answered=None, on_answer=None):
+        # answered: LLM answers checkpointed by an earlier, interrupted run; on_answer(field, answer)
+        # is called as each new one arrives so it can be checkpointed too
+        self.load_models()
+        if self.ollama is not None:
+            return self.ollama_loop.run(self.extract_info_async(text, answered, on_answer))
+
+        # Deterministic fast path for the most structured columns
+        output = extract_rule_fields(text)
+        cnic = find_cnic(text)
+        if output:
+            print(f"⚡ Matched by rules: {', '.join(output)}")
+        for field in output:
+            self.metrics.field(field, 0.0, source="rules")
+
         # Truncate to fit token limits
         # max_chars = 4900 * 4
         # if len(text) > max_chars:
         #     print("⛔ Resume too long. Truncating text.")
         #     text = text[:max_chars]
 
-        system_message = SystemMessage(content=f"""
-    You are an expert resume extractor. Extract the following structured information from this resume:
+        from langchain.schema.messages import HumanMessage, SystemMessage
+        system_message = SystemMessage(content=SYSTEM_PROMPT)
 
-    1. Candidate Name & CNIC
-    2. Father's Name
-    3. Date of Birth (DOB)
-    4. SSC Field / %age
-    5. HSSC Field / %age
-    6. Graduation Field / CGPA / Passing Year
-    7. Courses
-    8. Experience Detail with Dates
-    9. Total Experience (in years and months)
-    10. Contact Number
-    11. Email
-    12. Address
-    """)
+        output.update(answered or {})
+        on_answer = on_answer or (lambda field, answer: None)
 
-        resume_context = f"Resume For the Candidate Name : {text}"
-        print(resume_context)
-        def get_response(user_prompt):
+        print(f"Resume For the Candidate Name : {text}")
+        def get_response(field, user_prompt, context, tier=0, **kwargs):
+            resume_context = f"Resume For the Candidate Name : {context}"
             messages = [system_message, HumanMessage(content=resume_context + "\n\n" + user_prompt)]
-            return self.llm.invoke(messages).content.strip()
-
-        output = {
-            "Candidate Name & SCNIC No": get_response("Give only 'Candidate Name & SCNIC' "),
-            "Father's Name": get_response("From the Resume above, extract the Father's Name of the candidate"),
-            "DOB": get_response("Give only 'Date of Birth (DOB)'"),
-            "SSC Field / %age": get_response("Give only 'SSC Field / %age'"),
-            "HSSC Field / %age": get_response("Give only 'HSSC Field / %age'"),
-            "Graduation Field / CGPA / Passing Year": get_response(
-                "Give only 'Graduation Field / CGPA / Passing Year'"),
-            "Courses": get_response("Give only 'Courses or CERTIFICATIONS / PROFESSIONAL COURSES '"),
-            "Experience Detail with Dates": get_response("Give only '(Experience or Work Experience) Detail with Dates'"),
-            "Total Experience": get_response(f"Give only 'Total Experience' and now today is {today}"),
-            "Contact Number": get_response("Give only 'Contact Number or Phone Number From The First mentioned name in the Resume above'"),
-            "Email": get_response("Give only 'Email' From The First mentioned name in the Resume above"),
-            "Address": get_response("Give only 'Address or Home' From The First mentioned name in the Resume above"),
-        }
-
-        return output
+            start = time.perf_counter()
+            response = self.llm_tiers[tier].invoke(messages, **kwargs)
+            info = getattr(response, "response_metadata", None) or {}
+            self.token_counter.calibrate(SYSTEM_PROMPT + messages[1].content, info.get("prompt_eval_count"))
+            self.metrics.field(field, time.perf_counter() - start,
+                               info.get("prompt_eval_count"), info.get("eval_count"), tier=tier)
+            return field_answer(field, response.content.strip())
+
+        sections = segment_sections(text)
+
+        pending = [field for field in FIELD_NAMES if field not in output]
+        # Total Experience is computed from the experience dates below, not asked for in the JSON
+        json_fields = [field for field in pending if field != "Total Experience"]
+        # No JSON request when a resumed or near-duplicate CV has nothing left to ask in it
+        if self.extraction_mode == "single_call" and json_fields:
+            context = pack_context(text, sections, "single_call", self.resume_tokens, self.token_counter, slice_sections=False)
+            answers, missing = parse_json_response(get_response("single_call", build_json_instruction(json_fields), context, **self.json_options(json_fields)), json_fields)
+            # With a cascade, answers failing validation are re-asked one by one like missing ones
+            for field in self.cascade.failing(answers):
+                del answers[field]
+                missing.append(field)
+            pending = missing + [field for field in pending if field == "Total Experience"]
+            output.update(answers)
+            for field, answer in answers.items():
+                on_answer(field, answer)
+            if pending:
+                print(f"🔁 Retrying {len(pending)} field(s) one by one: {', '.join(pending)}")
+
+        # Per-field path; in single-call mode only the missing/invalid fields get here.
+        # FIELD_NAMES order puts Total Experience after the experience detail it is computed from
+        for field in pending:
+            if field == "Total Experience" and self.computed_experience(output, on_answer):
+                continue
+            output[field] = self.cascade.answer(field, partial(
+                get_response, field, FIELD_PROMPTS[field], self.field_context(text, sections, field),
+                **self.field_options(field)))
+            on_answer(field, output[field])
+
+        output["Candidate Name & CNIC No"] = attach_cnic(output["Candidate Name & CNIC No"], cnic)
+        return {field: output[field] for field in FIELD_NAMES}
+
+    async def extract_info_async(self, text, answered=None, on_answer=None):
+        # Same flow as extract_info_with_llama, but the per-field questions are sent concurrently
+        output = extract_rule_fields(text)
+        cnic = find_cnic(text)
+        if output:
+            print(f"⚡ Matched by rules: {', '.join(output)}")
+        output.update(answered or {})
+        on_answer = on_answer or (lambda field, answer: None)
+
+        async def get_response(field, user_prompt, context, tier=0, **kwargs):
+            messages = [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": f"Resume For the Candidate Name : {context}" + "\n\n" + user_prompt},
+            ]
+            start = time.perf_counter()
+            data = await self.ollama_tiers[tier].chat(messages, **kwargs)
+            self.token_counter.calibrate(SYSTEM_PROMPT + messages[1]["content"], data.get("prompt_eval_count"))
+            self.metrics.field(field, time.perf_counter() - start,
+                               data.get("prompt_eval_count"), data.get("eval_count"), tier=tier)
+            return field_answer(field, data["message"]["content"].strip())
+
+        async def answer_field(field):
+            answer = await self.cascade.answer_async(field, partial(
+                get_response, field, FIELD_PROMPTS[field], self.field_context(text, sections, field),
+                **self.field_options(field)))
+            on_answer(field, answer)
+            return answer
+
+        sections = segment_sections(text)
+
+        pending = [field for field in FIELD_NAMES if field not in output]
+        json_fields = [field for field in pending if field != "Total Experience"]
+        if self.extraction_mode == "single_call" and json_fields:
+            context = pack_context(text, sections, "single_call", self.resume_tokens, self.token_counter, slice_sections=False)
+            answers, missing = parse_json_response(await get_response("single_call", build_json_instruction(json_fields), context, **self.json_options(json_fields)), json_fields)
+            # With a cascade, answers failing validation are re-asked one by one like missing ones
+            for field in self.cascade.failing(answers):
+                del answers[field]
+                missing.append(field)
+            pending = missing + [field for field in pending if field == "Total Experience"]
+            output.update(answers)
+            for field, answer in answers.items():
+                on_answer(field, answer)
+            if pending:
+                print(f"🔁 Retrying {len(pending)} field(s) one by one: {', '.join(pending)}")
+
+        # Total Experience waits for the experience detail it is computed from
+        concurrent = [field for field in pending if field != "Total Experience"]
+        answers = await asyncio.gather(*(answer_field(field) for field in concurrent))
+        output.update(zip(concurrent, answers))
+        if "Total Experience" in pending and not self.computed_experience(output, on_answer):
+            output["Total Experience"] = await answer_field("Total Experience")
+
+        output["Candidate Name & CNIC No"] = attach_cnic(output["Candidate Name & CNIC No"], cnic)
+        return {field: output[field] for field in FIELD_NAMES}
+
+    def field_options(self, field):
+        # Per-field token cap and stop strings; Ollama already stops at the chat template's end of turn.
+        # Ollama takes no GBNF, so the per-field grammars in field_specs only apply to app.py
+        num_predict, stop = output_limits(field, self.max_new_tokens)
+        return {"num_predict": num_predict, "stop": stop}
+
+    def json_options(self, fields):
+        return {"format": answer_schema(fields) if self.constrain_output else "json",
+                "num_predict": json_answer_budget(fields)}
+
 #     def extract_info_with_llama(self, text):
 #         # Rough token count estimate (1 token ~ 4 characters)
 #         max_tokens = 4900  # keep below limit for prompt + output
@@ -214,81 +393,8 @@ class CVProcessor:
 #         #print(output)
 #         return output
 
-    def append_to_excel(self, data, sr_no):
-        df = pd.read_excel(self.output_file)
-
-        # Ensure ordered keys
-        ordered_keys = [
-            "Candidate Name & CNIC No",
-            "Father's Name",
-            "DOB",
-            "SSC Field / %age",
-            "HSSC Field / %age",
-            "Graduation Field / CGPA / Passing Year",
-            "Courses",
-            "Experience Detail with Dates",
-            "Total Experience",
-            "Contact Number",
-            "Email",
-            "Address"
-        ]
-
-        # Build ordered row
-        row = {"Sr No": sr_no}
-        for key in ordered_keys:
-            row[key] = data.get(key, "")
-
-        # Append to DataFrame
-        df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-        df.to_excel(self.output_file, index=False)
-        print(f"✅ CV appended for Sr No: {sr_no}")
-
-    # def append_to_excel(self, data, sr_no):
-    #     df = pd.read_excel(self.output_file)
-    #     row = {
-    #         "Sr No": sr_no,
-    #         **data
-    #     }
-    #     df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-    #     df.to_excel(self.output_file, index=False)
-    #     print(f"✅ CV appended for Sr No: {sr_no}")
-
-    def process_new_cvs(self):
-        files = [f for f in os.listdir(self.cv_folder) if f.lower().endswith(".pdf")]
-        archived = set(os.listdir(self.archive_folder))
-
-        if not files:
-            print("📂 No CV files found.")
-            return
-
-        new_files = [f for f in files if f not in archived]
-        if not new_files:
-            print("🟡 No new CVs found.")
-            return
-
-        try:
-            df = pd.read_excel(self.output_file)
-            current_sr = len(df) + 1
-        except FileNotFoundError:
-            current_sr = 1
-
-        for i, file_name in enumerate(new_files):
-            file_path = os.path.join(self.cv_folder, file_name)
-            print(f"🔍 Processing: {file_name}")
-            text = self.extract_text_from_pdf(file_path)
-            info = self.extract_info_with_llama(text)
-            self.append_to_excel(info, current_sr + i)
-            shutil.move(file_path, os.path.join(self.archive_folder, file_name))
-            print(f"📦 Archived: {file_name}")
-
-    def run(self):
-        print("🚀 CV Processor is now running...")
-        while True:
-            self.process_new_cvs()
-            time.sleep(self.interval)
-
 
 if __name__ == "__main__":
-    processor = CVProcessor()
-    processor.run()
+    from cli import main
+    main(CVProcessor)
 
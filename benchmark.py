@@ -0,0 +1,276 @@
+"""
+Reproducible throughput benchmark for CVProcessor.
+
+    python benchmark.py --app app_2 --sizes 10,1000,10000 --llm-latency 0.05 --output benchmark_report.json
+
+For every corpus size a synthetic set of PDF CVs (varied length and page count, seeded) is
+generated and pushed through CVProcessor.process_new_cvs end to end, with the model replaced
+by a deterministic fake that sleeps for a configurable latency. Each size runs in a fresh
+subprocess so peak RSS is measured per size. The JSON report has per-stage timings, CVs per
+minute, LLM call counts and peak RSS.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from context_budget import TokenCounter
+
+FIRST_NAMES = ["Muhammad", "Ahmed", "Ali", "Usman", "Bilal", "Hamza", "Ayesha", "Fatima", "Zainab", "Sana", "Hira", "Omar"]
+LAST_NAMES = ["Khan", "Hussain", "Iqbal", "Afzal", "Nazakat", "Malik", "Butt", "Qureshi", "Sheikh", "Raza", "Javed"]
+CITIES = ["Lahore", "Karachi", "Islamabad", "Rawalpindi", "Faisalabad", "Multan", "Peshawar"]
+COMPANIES = ["Systems Ltd", "NetSol", "Arbisoft", "10Pearls", "TPL Trakker", "Jazz", "Ufone", "HBL", "Engro", "K-Electric"]
+ROLES = ["Software Engineer", "Data Analyst", "Network Engineer", "Accountant", "HR Officer", "Project Manager", "QA Engineer"]
+DEGREES = ["BS Computer Science", "BBA", "BS Electrical Engineering", "B.Com", "BS Software Engineering", "MBA"]
+COURSES = ["CCNA", "AWS Cloud Practitioner", "PMP", "Python for Data Science", "ACCA F1", "Google Analytics", "MS Office"]
+FILLER = ("Responsible for delivering projects on time, coordinating with cross functional teams, "
+          "preparing reports for management and improving internal processes across departments.")
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def synthetic_cv_lines(rng, jobs, filler_lines):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    father = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    year = rng.randint(1975, 2002)
+    lines = [
+        name,
+        f"Father's Name: {father}",
+        f"CNIC: {rng.randint(10000, 99999)}-{rng.randint(1000000, 9999999)}-{rng.randint(1, 9)}",
+        f"Date of Birth: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{year}",
+        f"Phone: 03{rng.randint(0, 4)}{rng.randint(0, 9)}-{rng.randint(1000000, 9999999)}",
+        f"Email: {name.lower().replace(' ', '.')}{rng.randint(1, 99)}@example.com",
+        f"Address: House {rng.randint(1, 500)}, Street {rng.randint(1, 40)}, {rng.choice(CITIES)}",
+        "",
+        "EDUCATION",
+        f"Matric (SSC) Science, {rng.randint(60, 95)}%, {year + 16}",
+        f"Intermediate (HSSC) Pre-Engineering, {rng.randint(55, 95)}%, {year + 18}",
+        f"{rng.choice(DEGREES)}, CGPA {rng.uniform(2.5, 4.0):.2f}, {year + 22}",
+        "",
+        "WORK EXPERIENCE",
+    ]
+    start = year + 22
+    for i in range(jobs):
+        end = start + rng.randint(1, 4)
+        until = "Present" if i == jobs - 1 else f"{rng.choice(MONTHS)} {end}"
+        lines.append(f"{rng.choice(ROLES)} at {rng.choice(COMPANIES)}, {rng.choice(MONTHS)} {start} - {until}")
+        lines.extend([FILLER] * rng.randint(1, 3))
+        start = end
+    lines += ["", "CERTIFICATIONS"] + rng.sample(COURSES, rng.randint(1, 4))
+    lines += ["", "SKILLS"] + [FILLER] * filler_lines
+    return lines
+
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, lines, lines_per_page=48):
+    """Plain Helvetica text PDF, stdlib only, so the corpus needs no PDF-writing dependency."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    font_id = 3
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>", font_id: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for n, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * n, 5 + 2 * n
+        stream = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(f"({_pdf_escape(l)}) Tj T*" for l in page_lines) + " ET"
+        stream = stream.encode("latin-1", "replace")
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, content_id))
+        kids.append(b"%d 0 R" % page_id)
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (obj_id, objects[obj_id])
+    xref = len(out)
+    size = max(objects) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % size
+    for obj_id in range(1, size):
+        out += b"%010d 00000 n \n" % offsets[obj_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def generate_corpus(folder, size, seed=0):
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    for i in range(size):
+        # Mostly one-page CVs with a long tail of multi-page ones
+        jobs = rng.choice([1, 1, 2, 2, 3, 4, 6, 10])
+        filler = rng.choice([0, 2, 5, 10, 40, 120])
+        write_pdf(os.path.join(folder, f"cv_{i:05d}.pdf"), synthetic_cv_lines(rng, jobs, filler))
+
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeLLM:
+    """Deterministic stand-in for LlamaCpp / ChatOllama: fixed latency, canned answers."""
+
+    def __init__(self, latency=0.0, per_kchar=0.0):
+        self.latency = latency
+        self.per_kchar = per_kchar  # extra seconds per 1000 prompt characters, to model prefill
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        chat = not isinstance(prompt, str)
+        text = "\n".join(m.content for m in prompt) if chat else prompt
+        self.calls += 1
+        time.sleep(self.latency + self.per_kchar * len(text) / 1000)
+        if "these keys:" in text:  # single-call JSON instruction
+            keys = text.split("these keys:", 1)[-1].split('"')[1::2]
+            answer = json.dumps({key: "N/A" for key in keys})
+        else:
+            answer = "N/A"
+        return FakeMessage(answer) if chat else answer
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
+
+
+def run_one(app_name, size, seed, llm_latency, per_kchar, parse_workers, llm_workers, extraction_mode):
+    module = importlib.import_module(app_name)
+    fake = FakeLLM(llm_latency, per_kchar)
+
+    class BenchProcessor(module.CVProcessor):
+        def load_llama_model(self, *args):
+            return fake
+
+        def load_token_counter(self):
+            return TokenCounter()  # no tokenizer behind the fake model; app.py only
+
+    workdir = tempfile.mkdtemp(prefix="cv-bench-")
+    try:
+        start = time.perf_counter()
+        generate_corpus(os.path.join(workdir, "cvs"), size, seed)
+        generation = time.perf_counter() - start
+
+        kwargs = dict(
+            cv_folder=os.path.join(workdir, "cvs"),
+            archive_folder=os.path.join(workdir, "archive"),
+            output_file=os.path.join(workdir, "output.xlsx"),
+            db_file=os.path.join(workdir, "results.db"),
+            cache_file=os.path.join(workdir, "cv_cache.db"),
+            journal_folder=os.path.join(workdir, "journal"),
+            extraction_mode=extraction_mode,
+            parse_workers=parse_workers,
+            llm_workers=llm_workers,
+        )
+        if app_name == "app":
+            kwargs["use_prefix_cache"] = False  # the fake model has no llama.cpp state to snapshot
+            kwargs["constrain_output"] = False  # grammars are compiled by llama_cpp
+        processor = BenchProcessor(**kwargs)
+
+        timings = {}
+
+        def timed(name, func):
+            timings[name] = {"count": 0, "seconds": 0.0}
+
+            def wrapper(*args, **kw):
+                t = time.perf_counter()
+                try:
+                    return func(*args, **kw)
+                finally:
+                    timings[name]["count"] += 1
+                    timings[name]["seconds"] += time.perf_counter() - t
+            return wrapper
+
+        processor.append_to_excel = timed("store_append", processor.append_to_excel)
+        processor.archive_cv = timed("archive", processor.archive_cv)
+        processor.export_excel = timed("excel_export", processor.export_excel)
+
+        start = time.perf_counter()
+        processor.process_new_cvs()
+        wall = time.perf_counter() - start
+
+        stages = processor.batch_stats
+        timings["pdf_extraction"] = stages.get("parse")
+        timings["llm"] = stages.get("extract")
+        timings["write_stage"] = stages.get("write")
+        own_rss, child_rss = _peak_rss_mb()
+        return {
+            "app": app_name,
+            "corpus_size": size,
+            "processed": sum(name.endswith(".pdf") for name in os.listdir(kwargs["archive_folder"])),
+            "corpus_generation_s": round(generation, 3),
+            "wall_s": round(wall, 3),
+            "cvs_per_minute": round(size / wall * 60, 1) if wall else None,
+            "llm_calls": fake.calls,
+            "llm_calls_per_cv": round(fake.calls / size, 2) if size else None,
+            "stages": {name: {"count": t["count"], "seconds": round(t["seconds"], 4),
+                              "mean_ms": round(1000 * t["seconds"] / t["count"], 3) if t["count"] else None}
+                       for name, t in timings.items() if t},
+            "peak_rss_mb": own_rss,
+            "peak_child_rss_mb": child_rss,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CVProcessor throughput benchmark")
+    parser.add_argument("--app", default="app_2", choices=["app", "app_2"], help="which processor (PyPDF2 or pdfplumber path)")
+    parser.add_argument("--sizes", default="10,100,1000", help="comma-separated corpus sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="fake model seconds per call")
+    parser.add_argument("--llm-per-kchar", type=float, default=0.0, help="extra fake seconds per 1000 prompt chars")
+    parser.add_argument("--parse-workers", type=int, default=2)
+    parser.add_argument("--llm-workers", type=int, default=1)
+    parser.add_argument("--extraction-mode", default="per_field", choices=["per_field", "single_call"])
+    parser.add_argument("--output", default="benchmark_report.json")
+    parser.add_argument("--run-one", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    config = dict(app_name=args.app, seed=args.seed, llm_latency=args.llm_latency, per_kchar=args.llm_per_kchar,
+                  parse_workers=args.parse_workers, llm_workers=args.llm_workers, extraction_mode=args.extraction_mode)
+    if args.run_one is not None:
+        # Child mode: one size, result as the last stdout line
+        result = run_one(size=args.run_one, **config)
+        print(json.dumps(result))
+        return
+
+    runs = []
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        print(f"⏱️ Benchmarking {args.app} with {size} CV(s)...")
+        cmd = [sys.executable, os.path.abspath(__file__), "--run-one", str(size)] + [
+            a for a in sys.argv[1:] if not a.startswith("--run-one")]
+        proc = subprocess.run(cmd, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if proc.returncode != 0:
+            print(proc.stderr)
+            raise SystemExit(f"❌ Benchmark run for {size} CV(s) failed")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"   {result['cvs_per_minute']} CVs/min, peak RSS {result['peak_rss_mb']} MB")
+        runs.append(result)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": config,
+        "runs": runs,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
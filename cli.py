@@ -0,0 +1,216 @@
+"""
+Command line for both processors (app.py: llama.cpp, app_2.py: Ollama).
+
+    python app_2.py                          watch cvs/ and process new CVs forever (as before)
+    python app_2.py batch old_cvs/ "2024/**/*.pdf" --parse-workers 4
+                                             process a directory or glob once, then exit
+    python app_2.py health                   check folders, store and model without loading it
+
+Only the standard library is imported here; the processors load their model on the first CV
+that needs it, so runs with nothing to do return at once.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
+
+
+def collect_pdfs(inputs):
+    """PDF paths from directories and glob patterns, in order, without duplicates."""
+    paths = []
+    for spec in inputs:
+        if os.path.isdir(spec):
+            matches = [os.path.join(spec, name) for name in sorted(os.listdir(spec))]
+        else:
+            matches = sorted(glob.glob(spec, recursive=True))
+            if not matches:
+                print(f"⚠️ Nothing matches {spec}")
+        paths += [path for path in matches if path.lower().endswith(".pdf") and os.path.isfile(path)]
+    return list(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+
+class BatchProgress:
+    """
+    Pipeline monitor printing CVs/min and an ETA as CVs are written or fail.
+
+    Stage, failure and queue events are passed on to `inner` (the processor's metrics); a progress
+    line is printed at most every `every` seconds, and always for the last CV.
+    """
+
+    def __init__(self, total, inner=None, every=2.0):
+        self.total = total
+        self.inner = inner
+        self.every = every
+        self.done = 0
+        self.failed = 0
+        self.start = time.perf_counter()
+        self.last_report = 0.0
+
+    def observe_queue(self, queue, depth):
+        if self.inner is not None:
+            self.inner.observe_queue(queue, depth)
+
+    def observe_stage(self, stage, item, seconds):
+        if self.inner is not None:
+            self.inner.observe_stage(stage, item, seconds)
+        if stage != "write":
+            return
+        self.done += 1
+        self.report()
+
+    def observe_failure(self, stage, item, error):
+        if self.inner is not None:
+            self.inner.observe_failure(stage, item, error)
+        self.failed += 1
+        self.report()
+
+    def report(self):
+        now = time.perf_counter()
+        if now - self.last_report >= self.every or self.finished == self.total:
+            self.last_report = now
+            print("⏳ " + self.status(now))
+
+    @property
+    def finished(self):
+        # Failed CVs are finished too: they no longer count towards the ETA
+        return self.done + self.failed
+
+    def rate(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.start
+        return self.finished / elapsed * 60 if elapsed > 0 else 0.0
+
+    def status(self, now=None):
+        rate = self.rate(now)
+        remaining = self.total - self.finished
+        eta = format_duration(remaining / rate * 60) if rate and remaining else "-"
+        return (f"{self.done} done / {self.failed} failed / {self.total} CVs · {rate:.1f} CVs/min · "
+                f"ETA {eta}")
+
+
+def processor_kwargs(args):
+    # Only options given on the command line, so each processor keeps its own defaults
+    names = {"cvs": "cv_folder", "archive": "archive_folder", "output": "output_file", "db": "db_file",
+             "cache": "cache_file", "journal": "journal_folder", "metrics_dir": "metrics_dir",
+             "extraction_mode": "extraction_mode", "parse_workers": "parse_workers", "llm_workers": "llm_workers"}
+    return {name: getattr(args, option) for option, name in names.items() if getattr(args, option, None) is not None}
+
+
+def run_batch(processor, inputs):
+    """Process the PDFs behind `inputs` once; returns the process exit code."""
+    start = time.perf_counter()
+    paths = collect_pdfs(inputs)
+    todo, skipped, names = [], 0, set()
+    for path in paths:
+        name = os.path.basename(path)
+        # Results and journal entries are keyed by file name, like the archive
+        if name in names or os.path.exists(os.path.join(processor.archive_folder, name)):
+            skipped += 1
+            continue
+        names.add(name)
+        todo.append(path)
+    print(f"📋 {len(paths)} PDF(s) found, {len(todo)} to process, {skipped} already archived or repeated")
+
+    errors = {}
+    if todo:
+        progress = BatchProgress(len(todo), processor.metrics)
+        errors = processor.process_files(todo, monitor=progress)
+    elapsed = time.perf_counter() - start
+    processed = len(todo) - len(errors)
+    rate = processed / elapsed * 60 if elapsed > 0 else 0.0
+    print(f"🏁 Batch finished in {format_duration(elapsed)}: {processed} processed, {len(errors)} failed, "
+          f"{skipped} skipped · {rate:.1f} CVs/min")
+    for path, error in errors.items():
+        print(f"   ❌ {os.path.basename(path)}: {error}")
+    return 1 if errors else 0
+
+
+def health(processor_class, options):
+    """
+    Print the state of the folders, store, dependencies and model; returns the process exit code.
+
+    Nothing is created or written: no processor is built and the store is opened read-only.
+    """
+    import importlib.util
+    import sqlite3
+    from result_store import stored_rows
+
+    options = {**processor_class.default_options(), **options}
+    ok = True
+    cv_folder, archive_folder = options["cv_folder"], options["archive_folder"]
+    if os.path.isdir(cv_folder):
+        pending = [name for name in os.listdir(cv_folder) if name.lower().endswith(".pdf")
+                   and not os.path.exists(os.path.join(archive_folder, name))]
+        print(f"📂 {cv_folder}: {len(pending)} CV(s) waiting")
+    else:
+        print(f"📂 {cv_folder}: not created yet")
+    try:
+        rows = stored_rows(options["db_file"])
+        print(f"🗄️ {options['db_file']}: " + (f"{rows} row(s)" if rows is not None else "not created yet"))
+    except sqlite3.Error as error:
+        ok = False
+        print(f"❌ {options['db_file']}: unreadable ({error})")
+    journal_folder = options["journal_folder"]
+    in_flight = [name for name in os.listdir(journal_folder) if name.endswith(".json")] if os.path.isdir(journal_folder) else []
+    print(f"📝 {journal_folder}: {len(in_flight)} CV(s) in flight")
+    missing = [name for name in processor_class.REQUIRED_MODULES if importlib.util.find_spec(name) is None]
+    if missing:
+        ok = False
+        print("❌ missing Python packages: " + ", ".join(missing))
+    model_ok, message = processor_class.model_status(**options)
+    print(("✅ " if model_ok else "❌ ") + message)
+    return 0 if ok and model_ok else 1
+
+
+def build_parser(prog=None):
+    # Shared by the main parser and every command; SUPPRESS keeps a command from resetting options given before it
+    common = argparse.ArgumentParser(add_help=False, argument_default=argparse.SUPPRESS)
+    common.add_argument("--cvs", help="inbox folder (default cvs)")
+    common.add_argument("--archive", help="archive folder (default archive)")
+    common.add_argument("--output", help="Excel workbook (default output.xlsx)")
+    common.add_argument("--db", help="SQLite result store (default results.db)")
+    common.add_argument("--cache", help="text/field cache database (default cv_cache.db)")
+    common.add_argument("--journal", help="in-flight journal folder (default journal)")
+    common.add_argument("--metrics-dir", help="write per-stage metrics here")
+    common.add_argument("--extraction-mode", choices=["per_field", "single_call"])
+    common.add_argument("--parse-workers", type=int, help="PDF parse processes (default 2)")
+    common.add_argument("--llm-workers", type=int, help="concurrent CVs in the LLM stage (default 1)")
+
+    parser = argparse.ArgumentParser(prog=prog, description="Extract CV fields into output.xlsx", parents=[common])
+    commands = parser.add_subparsers(dest="command")
+    run = commands.add_parser("run", parents=[common], help="watch the inbox and process new CVs (default)")
+    run.add_argument("--poll", action="store_true", help="rescan every --interval seconds instead of inotify")
+    run.add_argument("--interval", type=int, help="seconds between rescans (default 30)")
+    batch = commands.add_parser("batch", parents=[common], help="process a directory or glob once and exit")
+    batch.add_argument("inputs", nargs="+", help="directories and/or glob patterns ('**' recurses)")
+    commands.add_parser("health", parents=[common], help="check folders, store and model, then exit")
+    return parser
+
+
+def main(processor_class, argv=None):
+    parser = build_parser(os.path.basename(sys.argv[0]))
+    args = parser.parse_args(argv)
+    kwargs = processor_kwargs(args)
+    command = args.command or "run"
+    if command == "run" and getattr(args, "interval", None) is not None:
+        kwargs["interval"] = args.interval
+    if command == "health":
+        sys.exit(health(processor_class, kwargs))
+    processor = processor_class(**kwargs)
+    try:
+        if command == "batch":
+            sys.exit(run_batch(processor, args.inputs))
+        processor.run(watch=not getattr(args, "poll", False))
+    finally:
+        processor.close()
@@ -0,0 +1,136 @@
+import math
+import os
+
+from section_segmenter import FIELD_SECTIONS
+
+# Which sections survive first when a resume does not fit; earlier groups win. Education is
+# compact and feeds three columns, so it goes ahead of a long experience section, which is trimmed at the tail
+SECTION_PRIORITY = ["header", "personal", "education", "experience", "courses", "other"]
+
+# Instructions, questions and chat markup around the resume, per prompt
+PROMPT_OVERHEAD_TOKENS = 512
+
+
+class TokenCounter:
+    """Counts tokens with the model's tokenizer; falls back to a conservative chars-per-token estimate."""
+
+    def __init__(self, tokenize=None, chars_per_token=3.0):
+        self.tokenize = tokenize
+        self.chars_per_token = chars_per_token
+
+    @property
+    def exact(self):
+        return self.tokenize is not None
+
+    def count(self, text):
+        if not text:
+            return 0
+        if self.tokenize is not None:
+            return len(self.tokenize(text))
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def calibrate(self, text, tokens):
+        """Tighten the estimate from a server-reported prompt token count (e.g. Ollama's prompt_eval_count)."""
+        if self.tokenize is not None or not text or not tokens:
+            return
+        # Only ever lower chars-per-token: a count shrunk by server-side prompt caching must not loosen the budget
+        self.chars_per_token = max(1.0, min(self.chars_per_token, len(text) / tokens))
+
+    def trim(self, text, budget):
+        """Longest prefix of `text` (cut at a line or word break when possible) within `budget` tokens."""
+        tokens = self.count(text)
+        if tokens <= budget:
+            return text
+        if budget <= 0:
+            return ""
+        cut = int(len(text) * budget / tokens)
+        while cut > 0:
+            piece = text[:cut]
+            for sep in ("\n", " "):
+                at = piece.rfind(sep)
+                if at > cut * 0.8:
+                    piece = piece[:at]
+                    break
+            if self.count(piece) <= budget:
+                return piece
+            cut = int(cut * 0.95)
+        return ""
+
+
+def llama_token_counter(llama):
+    # llama_cpp.Llama; BOS is part of the prompt overhead, not the resume
+    return TokenCounter(lambda text: llama.tokenize(text.encode("utf-8"), add_bos=False, special=False))
+
+
+def hf_token_counter(tokenizer_file):
+    """Counter from a tokenizer.json (e.g. the served model's); None when the file or `tokenizers` is missing."""
+    if not tokenizer_file:
+        return None
+    try:
+        from tokenizers import Tokenizer
+    except ImportError:
+        print("⚠️ `tokenizers` is not installed; estimating token counts")
+        return None
+    if not os.path.isfile(tokenizer_file):
+        print(f"⚠️ Tokenizer {tokenizer_file} not found; estimating token counts")
+        return None
+    try:
+        tokenizer = Tokenizer.from_file(tokenizer_file)
+    except Exception as error:  # tokenizers reports a malformed file as a bare Exception
+        print(f"⚠️ Could not load tokenizer {tokenizer_file}: {error}")
+        return None
+    return TokenCounter(lambda text: tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def context_size(resume_tokens, max_new_tokens, overhead=PROMPT_OVERHEAD_TOKENS, align=256):
+    """n_ctx just large enough for the packed resume, the prompt around it and the longest answer."""
+    needed = resume_tokens + overhead + max_new_tokens
+    return int(math.ceil(needed / align) * align)
+
+
+def text_char_budget(resume_tokens, contexts=4, chars_per_token=4.0):
+    """
+    Characters of raw resume text worth extracting: the distinct field contexts (header/personal,
+    education, experience, courses) are packed to resume_tokens each, so more text is never sent.
+    """
+    return int(resume_tokens * contexts * chars_per_token)
+
+
+def pack_context(text, sections, field, budget, counter, slice_sections=True):
+    """
+    Resume text for one field query, at most `budget` tokens.
+
+    With slice_sections the field's own sections are used (see FIELD_SECTIONS); otherwise, or when
+    they are missing, every section is a candidate. Candidates are admitted in SECTION_PRIORITY
+    order, the first one that does not fit is trimmed, and the result keeps document order.
+    """
+    if len(sections) < 2:
+        packed = counter.trim(text, budget)
+        if len(packed) < len(text):
+            print(f"⛔ Resume too long for '{field}'. Trimmed to {budget} tokens.")
+        return packed
+
+    groups = FIELD_SECTIONS.get(field) if slice_sections else None
+    candidates = [s for s in sections if groups is None or s[0] in groups]
+    if not any(text[start:end].strip() for _, _, start, end in candidates):
+        candidates = list(sections)
+    ranked = sorted(range(len(candidates)), key=lambda i: SECTION_PRIORITY.index(candidates[i][0])
+                    if candidates[i][0] in SECTION_PRIORITY else len(SECTION_PRIORITY))
+
+    kept = {}
+    remaining = budget
+    for i in ranked:
+        _, _, start, end = candidates[i]
+        part = text[start:end].strip()
+        if not part:
+            continue
+        tokens = counter.count(part)
+        if tokens > remaining:
+            part = counter.trim(part, remaining)
+            if part:
+                kept[i] = part
+            print(f"⛔ Resume too long for '{field}'. Lower-priority sections dropped to fit {budget} tokens.")
+            break
+        kept[i] = part
+        remaining -= tokens + 1  # +1 for the blank line joining sections
+    return "\n\n".join(kept[i] for i in sorted(kept))
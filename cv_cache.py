@@ -0,0 +1,105 @@
+import hashlib
+import json
+import sqlite3
+import threading
+
+
+def file_sha256(file_path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CVCache:
+    """
+    Persistent cache keyed by the SHA-256 of the PDF bytes.
+
+    Extracted text is stored per text extractor; parsed fields per model key, which the
+    processors build from the model identity, prompt version and extraction mode so that
+    changing any of them misses the old entries.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS texts ("
+            " pdf_sha256 TEXT NOT NULL, extractor TEXT NOT NULL, text TEXT NOT NULL,"
+            " PRIMARY KEY (pdf_sha256, extractor))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS fields ("
+            " pdf_sha256 TEXT NOT NULL, model_key TEXT NOT NULL, fields TEXT NOT NULL,"
+            " PRIMARY KEY (pdf_sha256, model_key))"
+        )
+        # OCR text of scanned pages, keyed by a hash of the page's image data (see pdf_ocr)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_pages ("
+            " page_sha256 TEXT NOT NULL, ocr_key TEXT NOT NULL, text TEXT NOT NULL,"
+            " PRIMARY KEY (page_sha256, ocr_key))"
+        )
+        self.conn.commit()
+
+    def get_text(self, pdf_sha256, extractor):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT text FROM texts WHERE pdf_sha256 = ? AND extractor = ?", (pdf_sha256, extractor)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_text(self, pdf_sha256, extractor, text):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO texts (pdf_sha256, extractor, text) VALUES (?, ?, ?)",
+                (pdf_sha256, extractor, text),
+            )
+
+    def get_fields(self, pdf_sha256, model_key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT fields FROM fields WHERE pdf_sha256 = ? AND model_key = ?", (pdf_sha256, model_key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_fields(self, pdf_sha256, model_key, fields):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO fields (pdf_sha256, model_key, fields) VALUES (?, ?, ?)",
+                (pdf_sha256, model_key, json.dumps(fields, ensure_ascii=False)),
+            )
+
+    def get_ocr(self, page_sha256, ocr_key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT text FROM ocr_pages WHERE page_sha256 = ? AND ocr_key = ?", (page_sha256, ocr_key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_ocr(self, page_sha256, ocr_key, text):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ocr_pages (page_sha256, ocr_key, text) VALUES (?, ?, ?)",
+                (page_sha256, ocr_key, text),
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+def load_cv_text(file_path, extract, extractor, cache_file):
+    """Pipeline parse stage: hash the PDF and return (sha256, text, cache hit), extracting only on a miss."""
+    pdf_sha256 = file_sha256(file_path)
+    cache = CVCache(cache_file)
+    try:
+        text = cache.get_text(pdf_sha256, extractor)
+        cached = text is not None
+        if not cached:
+            text = extract(file_path)
+            cache.put_text(pdf_sha256, extractor, text)
+    finally:
+        cache.close()
+    return pdf_sha256, text, cached
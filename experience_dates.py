@@ -0,0 +1,167 @@
+"""
+Total Experience computed from the date ranges in "Experience Detail with Dates".
+
+Ranges such as "Jan 2019 – Present", "03/2020-08/2022" or "2015 to 2018" are normalised to
+month intervals, overlapping jobs are merged, and the union is reported as "N years M months".
+
+    python experience_dates.py --db results.db --output output.xlsx
+
+recomputes the column for every stored row in one vectorised pass and rebuilds the workbook.
+"""
+import argparse
+import re
+from datetime import date
+
+MONTHS = {"jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+          "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12}
+
+_MONTH_NAME = (r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+               r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?")
+
+
+def _date(prefix):
+    # "Jan 2019", "January, 2019", "03/2020", "3-2020" or a bare "2019"
+    return (rf"(?:(?P<{prefix}_name>{_MONTH_NAME})[\s,'’-]*|(?P<{prefix}_num>0?[1-9]|1[0-2])\s*[/.-]\s*)?"
+            rf"(?P<{prefix}_year>(?:19|20)\d\d)")
+
+
+RANGE_PATTERN = (
+    r"(?<![\d/.-])" + _date("start")
+    + r"\s*(?:-|–|—|to\b|till\b|until\b)\s*"
+    + r"(?:" + _date("end")
+    + r"|(?P<present>present|current(?:ly)?|now|ongoing|continuing|till\s+date|to\s+date|date))"
+)
+RANGE_RE = re.compile(RANGE_PATTERN, re.IGNORECASE)
+
+
+def _month_number(name, number):
+    if name:
+        return MONTHS[name[:3].lower()]
+    return int(number) if number else None
+
+
+def _interval(start, end, today_index):
+    """
+    [start, end) in months since year 0, from ((name, number, year), (name, number, year) | None);
+    None for a reversed range or one starting in the future, which are misreadings, not zero months.
+    """
+    start_month = _month_number(start[0], start[1]) or 1
+    first = int(start[2]) * 12 + start_month - 1
+    if end is None:
+        last = today_index + 1  # the current month counts
+    else:
+        end_month = _month_number(end[0], end[1])
+        # A month-precise end is inclusive; a bare year ends where that year starts ("2015 - 2018" = 3 years)
+        last = int(end[2]) * 12 + (end_month if end_month else 0)
+    last = min(last, today_index + 1)
+    return (first, last) if last > first else None
+
+
+def merged_months(intervals):
+    """Months covered by the union of [start, end) intervals."""
+    total, covered_to = 0, None
+    for first, last in sorted(intervals):
+        if covered_to is not None:
+            first = max(first, covered_to)
+        if last > first:
+            total += last - first
+        covered_to = last if covered_to is None else max(covered_to, last)
+    return total
+
+
+def format_months(months):
+    years, months = divmod(int(months), 12)
+    parts = []
+    if years:
+        parts.append(f"{years} year{'s' if years != 1 else ''}")
+    if months or not years:
+        parts.append(f"{months} month{'s' if months != 1 else ''}")
+    return " ".join(parts)
+
+
+def total_experience(detail, today=None):
+    """'N years M months' from the ranges in `detail`, or None when it has no usable range."""
+    today = today or date.today()
+    today_index = today.year * 12 + today.month - 1
+    intervals = []
+    for match in RANGE_RE.finditer(detail or ""):
+        start = match.group("start_name", "start_num", "start_year")
+        end = None if match.group("present") else match.group("end_name", "end_num", "end_year")
+        interval = _interval(start, end, today_index)
+        if interval is not None:
+            intervals.append(interval)
+    if not intervals:
+        return None
+    return format_months(merged_months(intervals))
+
+
+def total_experience_batch(details, today=None):
+    """
+    Vectorised total_experience over a pandas Series of experience details (same index out).
+
+    Every range of every row is extracted in one pass, turned into month indices with column
+    arithmetic, and merged per row: sorted by start, each interval only counts the months past
+    the furthest end seen before it in the same row. Rows without a usable range (see _interval)
+    come back missing.
+    """
+    import numpy as np
+    import pandas as pd
+
+    today = today or date.today()
+    today_index = today.year * 12 + today.month - 1
+    ranges = details.fillna("").astype(str).str.extractall(RANGE_RE)
+    result = pd.Series(None, index=details.index, dtype=object)
+    if ranges.empty:
+        return result
+
+    def month(prefix, default):
+        names = ranges[prefix + "_name"].str[:3].str.lower().map(MONTHS)
+        numbers = pd.to_numeric(ranges[prefix + "_num"], errors="coerce")
+        return names.fillna(numbers).fillna(default)
+
+    first = pd.to_numeric(ranges["start_year"]) * 12 + month("start", 1) - 1
+    # Inclusive month-precise end, exclusive bare-year end, "Present" up to this month; never in the future
+    end_year = pd.to_numeric(ranges["end_year"], errors="coerce")
+    last = end_year * 12 + month("end", 0)
+    last = last.where(ranges["present"].isna(), today_index + 1).clip(upper=today_index + 1)
+
+    frame = pd.DataFrame({"row": ranges.index.get_level_values(0), "first": first.values, "last": last.values})
+    frame = frame[frame["last"] > frame["first"]]
+    if frame.empty:
+        return result
+    frame = frame.sort_values(["row", "first"], kind="mergesort")
+    covered_to = frame.groupby("row")["last"].cummax().groupby(frame["row"]).shift()
+    start = np.maximum(frame["first"], covered_to.fillna(-np.inf))
+    months = (frame["last"] - start).clip(lower=0).groupby(frame["row"]).sum()
+
+    result.loc[months.index] = [format_months(value) for value in months]
+    return result
+
+
+def recompute_total_experience(store, today=None):
+    """Recompute the Total Experience column of every row in a ResultStore; returns how many changed."""
+    import pandas as pd
+
+    rows = pd.DataFrame(list(store.rows()))
+    if rows.empty:
+        return 0
+    computed = total_experience_batch(rows["Experience Detail with Dates"], today)
+    changed = computed.notna() & (computed != rows["Total Experience"])
+    store.update_field("Total Experience", dict(zip(rows.loc[changed, "Sr No"], computed[changed])))
+    return int(changed.sum())
+
+
+if __name__ == "__main__":
+    from result_store import ResultStore
+
+    parser = argparse.ArgumentParser(description="Recompute Total Experience for all stored CVs")
+    parser.add_argument("--db", default="results.db")
+    parser.add_argument("--output", default="output.xlsx", help="workbook to rebuild afterwards ('' to skip)")
+    args = parser.parse_args()
+    store = ResultStore(args.db)
+    changed = recompute_total_experience(store)
+    print(f"🧮 Total Experience recomputed, {changed} row(s) changed")
+    if args.output:
+        store.export_excel(args.output)
+        print(f"📊 Excel updated: {args.output}")
+    store.close()
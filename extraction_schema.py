@@ -0,0 +1,67 @@
+import json
+import re
+
+# Excel column order (without "Sr No"), shared by both processors
+FIELD_NAMES = [
+    "Candidate Name & CNIC No",
+    "Father's Name",
+    "DOB",
+    "SSC Field / %age",
+    "HSSC Field / %age",
+    "Graduation Field / CGPA / Passing Year",
+    "Courses",
+    "Experience Detail with Dates",
+    "Total Experience",
+    "Contact Number",
+    "Email",
+    "Address",
+]
+
+
+def answer_schema(fields):
+    """JSON schema of a single-call answer over `fields`; also used to constrain decoding."""
+    fields = list(fields)
+    return {
+        "type": "object",
+        "properties": {field: {"type": "string"} for field in fields},
+        "required": fields,
+        "additionalProperties": False,
+    }
+
+
+# Python types of the JSON schema types answer_schema uses
+_JSON_TYPES = {"string": str}
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def build_json_instruction(fields=FIELD_NAMES):
+    keys = ", ".join(json.dumps(field) for field in fields)
+    return (
+        "Return only a JSON object with exactly these keys: " + keys + ". "
+        "Every value must be a plain string with the answer from the above Resume. "
+        "Use an empty string when the resume does not mention it."
+    )
+
+
+def parse_json_response(raw, fields=FIELD_NAMES):
+    """
+    Parse a single-call answer and check it against answer_schema(fields); returns (values, fields
+    that need a retry). A value of the wrong type (a number, a list) is retried, not coerced.
+    """
+    match = _JSON_OBJECT.search(raw or "")
+    try:
+        data = json.loads(match.group(0)) if match else None
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return {}, list(fields)
+
+    schema = answer_schema(fields)
+    values, missing = {}, []
+    for field in schema["required"]:
+        value = data.get(field)
+        if isinstance(value, _JSON_TYPES[schema["properties"][field]["type"]]):
+            values[field] = value.strip()
+        else:
+            missing.append(field)
+    return values, missing
@@ -0,0 +1,74 @@
+import re
+
+# Rule-based extractors for the most structured columns; the LLM is only asked when none match
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[A-Za-z]{2,}")
+
+# Pakistani mobile (03xx-xxxxxxx, +92 3xx xxxxxxx, 0092...) and landline (042-35xxxxxx, +92 51 xxxxxxx)
+PHONE_RE = re.compile(
+    r"(?<![\w+])(?:"
+    r"(?:\+92|0092|92)[\s-]?3\d{2}[\s-]?\d{7}"
+    r"|03\d{2}[\s-]?\d{7}"
+    r"|(?:\+92|0092)[\s-]?\(?[1-9]\d{1,3}\)?[\s-]?\d{6,8}"
+    r"|\(?0[1-9]\d{1,3}\)?[\s-]?\d{6,8}"
+    r")(?!\d)"
+)
+
+CNIC_RE = re.compile(r"(?<!\d)\d{5}-\d{7}-\d(?!\d)")
+# Undashed 13-digit CNIC, only trusted next to a CNIC/NIC label
+CNIC_LABELLED_RE = re.compile(r"\b(?:CNIC|NIC)\b[^\d\n]{0,20}(\d{5})[\s-]?(\d{7})[\s-]?(\d)(?!\d)", re.IGNORECASE)
+
+_MONTH = (r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?"
+          r"|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)")
+DATE_PATTERN = (
+    r"(?:\d{1,2}[/.-]\d{1,2}[/.-](?:19|20)\d{2}"                    # 12/03/1995, 12-03-1995, 12.03.1995
+    r"|(?:19|20)\d{2}[/.-]\d{1,2}[/.-]\d{1,2}"                      # 1995-03-12
+    r"|\d{1,2}(?:st|nd|rd|th)?[\s-]+" + _MONTH + r"\.?,?[\s-]+(?:19|20)\d{2}"  # 12th March 1995, 12-Mar-1995
+    r"|" + _MONTH + r"\.?\s+\d{1,2}(?:st|nd|rd|th)?,?\s+(?:19|20)\d{2})"     # March 12, 1995
+)
+DATE_RE = re.compile(DATE_PATTERN, re.IGNORECASE)
+# A date only counts as DOB when it follows a birth-date label, so job dates are never picked up
+DOB_RE = re.compile(
+    r"(?:Date\s*of\s*Birth|D\.?\s?O\.?\s?B\.?|Birth\s*Date|Born(?:\s+on)?)\s*[:\-]?\s*(" + DATE_PATTERN + ")",
+    re.IGNORECASE,
+)
+
+
+def find_email(text):
+    match = EMAIL_RE.search(text)
+    return match.group(0) if match else None
+
+
+def find_phone(text):
+    match = PHONE_RE.search(text)
+    return match.group(0).strip() if match else None
+
+
+def find_cnic(text):
+    match = CNIC_RE.search(text)
+    if match:
+        return match.group(0)
+    match = CNIC_LABELLED_RE.search(text)
+    return "-".join(match.groups()) if match else None
+
+
+def find_dob(text):
+    match = DOB_RE.search(text)
+    return match.group(1) if match else None
+
+
+def extract_rule_fields(text):
+    """Columns that could be filled without the LLM, keyed like FIELD_NAMES."""
+    found = {
+        "Email": find_email(text),
+        "Contact Number": find_phone(text),
+        "DOB": find_dob(text),
+    }
+    return {field: value for field, value in found.items() if value}
+
+
+def attach_cnic(name_answer, cnic):
+    # The name/CNIC column still needs the LLM for the name; make sure the matched CNIC is in it
+    if not cnic or re.sub(r"\D", "", cnic) in re.sub(r"\D", "", name_answer or ""):
+        return name_answer
+    return f"{name_answer.strip()} / CNIC: {cnic}" if name_answer and name_answer.strip() else f"CNIC: {cnic}"
@@ -0,0 +1,102 @@
+import json
+from functools import lru_cache
+
+from extraction_schema import answer_schema
+
+# GBNF grammars for the columns with a fixed shape; "N/A" is always allowed so a missing
+# value cannot force the model to invent one
+DOB_GBNF = r'''
+root  ::= " "? (date | "N/A")
+date  ::= num sep num sep year | num " "? month ","? " "? year | month " " num ","? " " year | year "-" num "-" num
+num   ::= [0-9] [0-9]?
+year  ::= [12] [0-9] [0-9] [0-9]
+sep   ::= "/" | "-" | "."
+month ::= [A-Za-z] [a-z] [a-z] [a-z]* "."?
+'''
+
+EMAIL_GBNF = r'''
+root  ::= " "? (email (", " email)* | "N/A")
+email ::= [A-Za-z0-9._%+-]+ "@" [A-Za-z0-9-]+ ("." [A-Za-z0-9-]+)+
+'''
+
+PHONE_GBNF = r'''
+root  ::= " "? (phone (", " phone)* | "N/A")
+phone ::= "+"? [0-9] [0-9 ()-]* [0-9]
+'''
+
+TOTAL_EXPERIENCE_GBNF = r'''
+root   ::= " "? (years (" " months)? | months | "N/A")
+years  ::= [0-9] [0-9]? ("." [0-9])? " " ("years" | "year")
+months ::= [0-9] [0-9]? " " ("months" | "month")
+'''
+
+# Output spec per column: generation cap, whether the answer may span lines, optional grammar
+FIELD_OUTPUT = {
+    "Candidate Name & CNIC No": {"max_tokens": 32, "multiline": False, "grammar": None},
+    "Father's Name": {"max_tokens": 16, "multiline": False, "grammar": None},
+    "DOB": {"max_tokens": 16, "multiline": False, "grammar": DOB_GBNF},
+    "SSC Field / %age": {"max_tokens": 32, "multiline": False, "grammar": None},
+    "HSSC Field / %age": {"max_tokens": 32, "multiline": False, "grammar": None},
+    "Graduation Field / CGPA / Passing Year": {"max_tokens": 48, "multiline": False, "grammar": None},
+    "Courses": {"max_tokens": 160, "multiline": True, "grammar": None},
+    "Experience Detail with Dates": {"max_tokens": 384, "multiline": True, "grammar": None},
+    "Total Experience": {"max_tokens": 16, "multiline": False, "grammar": TOTAL_EXPERIENCE_GBNF},
+    "Contact Number": {"max_tokens": 32, "multiline": False, "grammar": PHONE_GBNF},
+    "Email": {"max_tokens": 32, "multiline": False, "grammar": EMAIL_GBNF},
+    "Address": {"max_tokens": 64, "multiline": False, "grammar": None},
+}
+
+# Where a rambling answer usually turns into commentary or an invented next turn
+ANSWER_STOPS = ["\nUser:", "\nNote:", "\nExplanation:"]
+
+
+def output_limits(field, max_new_tokens, stops=()):
+    """(max_tokens, stop strings) for one field; `stops` adds the backend's own end-of-turn markers."""
+    spec = FIELD_OUTPUT.get(field)
+    if spec is None:
+        return max_new_tokens, list(stops)
+    return min(spec["max_tokens"], max_new_tokens), list(stops) + ANSWER_STOPS
+
+
+def field_answer(field, answer):
+    """
+    The answer to store for `field`. A single-line column keeps its first line of content: no
+    "\n" stop string, since the model may open with a line break or a lead-in such as
+    "Here is the SSC field:", and a stop would cut the answer down to that.
+    """
+    spec = FIELD_OUTPUT.get(field)
+    if spec is None or spec["multiline"]:
+        return answer
+    lines = [line.strip() for line in answer.splitlines() if line.strip()]
+    while len(lines) > 1 and lines[0].endswith(":"):
+        del lines[0]
+    return lines[0] if lines else answer.strip()
+
+
+@lru_cache(maxsize=None)
+def llama_grammar(field):
+    """Compiled LlamaGrammar for `field`, or None; compiled once per process."""
+    spec = FIELD_OUTPUT.get(field)
+    if spec is None or spec["grammar"] is None:
+        return None
+    from llama_cpp import LlamaGrammar
+    return LlamaGrammar.from_string(spec["grammar"], verbose=False)
+
+
+@lru_cache(maxsize=None)
+def llama_json_grammar(fields):
+    """LlamaGrammar for the single-call JSON answer over `fields` (a tuple)."""
+    from llama_cpp import LlamaGrammar
+    return LlamaGrammar.from_json_schema(json.dumps(answer_schema(fields)), verbose=False)
+
+
+def json_answer_budget(fields):
+    # Every field's own cap plus room for its key and quoting, so one JSON call is not cut off mid-object
+    return sum(FIELD_OUTPUT.get(field, {"max_tokens": 64})["max_tokens"] + 8 for field in fields) + 8
+
+
+def longest_answer(max_new_tokens, extraction_mode):
+    """Tokens the longest reply may take: one field's answer, or in single-call mode the JSON object over every field."""
+    if extraction_mode == "single_call":
+        return max(max_new_tokens, json_answer_budget(FIELD_OUTPUT))
+    return max_new_tokens
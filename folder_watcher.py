@@ -0,0 +1,135 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    return _libc
+
+
+def inotify_available():
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        return hasattr(_load_libc(), "inotify_init1")
+    except OSError:
+        return False
+
+
+class FolderWatcher:
+    """
+    Blocks on inotify events for one folder and hands back files that have finished arriving.
+
+    A file is ready once its writer closed it (or it was moved in) and its size has not changed
+    for `settle` seconds; files that are never closed are picked up after `stale` quiet seconds.
+    """
+
+    def __init__(self, folder, suffix=".pdf", settle=0.25, stale=5.0):
+        self.folder = folder
+        self.suffix = suffix.lower()
+        self.settle = settle
+        self.stale = stale
+        self.pending = {}  # name -> [last event time, last seen size, closed]
+        self.fd = None
+
+    def __enter__(self):
+        libc = _load_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CREATE | IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO
+        if libc.inotify_add_watch(fd, os.fsencode(self.folder), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, f"inotify_add_watch failed for {self.folder}")
+        self.fd = fd
+        return self
+
+    def __exit__(self, *exc):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def wait(self, timeout=None):
+        """Return the names of settled files, [] on timeout, or None if events were lost and a full scan is needed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            wake = None
+            if self.pending:
+                wake = self.settle
+            if deadline is not None:
+                remaining = max(0.0, deadline - now)
+                wake = remaining if wake is None else min(wake, remaining)
+
+            readable, _, _ = select.select([self.fd], [], [], wake)
+            if readable and self._read_events():
+                self.pending.clear()
+                return None
+
+            ready = self._settled()
+            if ready:
+                return ready
+            if deadline is not None and time.monotonic() >= deadline:
+                return []
+
+    def _read_events(self):
+        overflow = False
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return overflow
+            offset = 0
+            while offset < len(buf):
+                _, mask, _, length = _EVENT.unpack_from(buf, offset)
+                name = os.fsdecode(buf[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0"))
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif mask & IN_IGNORED:
+                    raise OSError(f"Watched folder {self.folder} is gone")
+                elif name.lower().endswith(self.suffix):
+                    state = self.pending.setdefault(name, [0.0, -1, False])
+                    state[0] = time.monotonic()
+                    if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                        state[2] = True
+
+    def _settled(self):
+        now = time.monotonic()
+        ready = []
+        for name, state in list(self.pending.items()):
+            last_event, last_size, closed = state
+            quiet = now - last_event
+            if quiet < self.settle:
+                continue
+            try:
+                size = os.path.getsize(os.path.join(self.folder, name))
+            except OSError:
+                del self.pending[name]  # moved away or deleted before it settled
+                continue
+            if size == last_size and (closed or quiet >= self.stale):
+                ready.append(name)
+                del self.pending[name]
+            else:
+                state[1] = size
+        return ready
@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+# Stages in the order a CV goes through them; the entry is deleted once it is archived
+STAGES = ("parsed", "extracted", "written")
+
+
+class JobJournal:
+    """
+    One small JSON file per in-flight CV, recording what is already done so a restart resumes.
+
+    Entries are keyed by file name and hold the PDF hash and model key they were made for (a
+    changed file or prompt set starts over), the field answers so far, the stage reached, the
+    Sr No once written, and a job id that makes the result-store append idempotent. Every update
+    is written to a temp file, fsynced and renamed over the old one, so a crash leaves either the
+    previous or the new checkpoint, never a torn one.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.lock = threading.Lock()
+        self.entries = {}
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, file_name):
+        return os.path.join(self.folder, file_name + ".json")
+
+    def _read(self, file_name):
+        try:
+            with open(self._path(file_name), encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            print(f"⚠️ Ignoring unreadable journal entry for {file_name}")
+            return None
+        return entry if isinstance(entry, dict) else None
+
+    def _write(self, file_name, entry):
+        entry["updated_at"] = round(time.time(), 3)
+        path = self._path(file_name)
+        tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+
+    def start(self, file_name, pdf_sha256, model_key):
+        """The entry to resume from, or a fresh one if there is none for this file content and model key."""
+        with self.lock:
+            entry = self.entries.get(file_name) or self._read(file_name)
+            if entry is None or entry.get("pdf_sha256") != pdf_sha256 or entry.get("model_key") != model_key:
+                entry = {
+                    "job_id": uuid.uuid4().hex,
+                    "file_name": file_name,
+                    "pdf_sha256": pdf_sha256,
+                    "model_key": model_key,
+                    "stage": "parsed",
+                    "fields": {},
+                }
+                self._write(file_name, entry)
+            self.entries[file_name] = entry
+            return entry
+
+    def get(self, file_name):
+        with self.lock:
+            entry = self.entries.get(file_name) or self._read(file_name)
+            if entry is not None:
+                self.entries[file_name] = entry
+            return entry
+
+    def field_done(self, file_name, field, answer):
+        with self.lock:
+            entry = self.entries[file_name]
+            entry["fields"][field] = answer
+            self._write(file_name, entry)
+
+    def stage_done(self, file_name, stage, **values):
+        with self.lock:
+            entry = self.entries[file_name]
+            entry["stage"] = stage
+            entry.update(values)
+            self._write(file_name, entry)
+
+    def finish(self, file_name):
+        with self.lock:
+            self.entries.pop(file_name, None)
+            try:
+                os.remove(self._path(file_name))
+            except FileNotFoundError:
+                pass
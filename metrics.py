@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+
+class _NullContext:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+class NullMetrics:
+    """Drop-in used when metrics are off: every hook is a no-op, so the hot path pays one method call."""
+
+    enabled = False
+
+    def stage(self, stage, **labels):
+        return _NULL_CONTEXT
+
+    def field(self, field, seconds, prompt_tokens=None, generated_tokens=None, cache_hit=False, source="llm", **labels):
+        pass
+
+    def cache(self, cache, hit, **labels):
+        pass
+
+    def escalation(self, field, reason):
+        pass
+
+    def observe_stage(self, stage, item, seconds):
+        pass
+
+    def observe_failure(self, stage, item, error):
+        pass
+
+    def observe_queue(self, queue, depth):
+        pass
+
+    def flush(self):
+        pass
+
+
+class _Stage:
+    def __init__(self, metrics, stage, labels):
+        self.metrics = metrics
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.record_stage(self.stage, time.perf_counter() - self.start, ok=exc_type is None, **self.labels)
+        return False
+
+
+class Metrics:
+    """
+    Per-stage and per-field measurements.
+
+    Every observation is appended to `jsonl_file` as it happens; running totals are written
+    to `prom_file` in the Prometheus textfile-collector format on flush() (end of each batch).
+    """
+
+    enabled = True
+
+    def __init__(self, jsonl_file, prom_file):
+        self.jsonl_file = jsonl_file
+        self.prom_file = prom_file
+        self.lock = threading.Lock()
+        self.stage_seconds = defaultdict(float)
+        self.stage_count = defaultdict(int)
+        self.stage_errors = defaultdict(int)
+        self.field_seconds = defaultdict(float)
+        self.field_count = defaultdict(int)
+        self.prompt_tokens = defaultdict(int)
+        self.generated_tokens = defaultdict(int)
+        self.cache_hits = defaultdict(int)
+        self.cache_misses = defaultdict(int)
+        self.cascade_answers = defaultdict(int)
+        self.escalations = defaultdict(int)
+        self.queue_depth = {}
+        self.jsonl = open(jsonl_file, "a", encoding="utf-8", buffering=1)
+
+    def _write(self, event, **fields):
+        line = json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, ensure_ascii=False)
+        self.jsonl.write(line + "\n")
+
+    def stage(self, stage, **labels):
+        return _Stage(self, stage, labels)
+
+    def record_stage(self, stage, seconds, ok=True, **labels):
+        with self.lock:
+            self.stage_seconds[stage] += seconds
+            self.stage_count[stage] += 1
+            if not ok:
+                self.stage_errors[stage] += 1
+            self._write("stage", stage=stage, seconds=round(seconds, 4), ok=ok, **labels)
+
+    def field(self, field, seconds, prompt_tokens=None, generated_tokens=None, cache_hit=False, source="llm", **labels):
+        tokens_per_sec = round(generated_tokens / seconds, 2) if generated_tokens and seconds > 0 else None
+        with self.lock:
+            self.field_seconds[field] += seconds
+            self.field_count[field] += 1
+            self.prompt_tokens[field] += prompt_tokens or 0
+            self.generated_tokens[field] += generated_tokens or 0
+            self._write("field", field=field, source=source, seconds=round(seconds, 4), prompt_tokens=prompt_tokens,
+                        generated_tokens=generated_tokens, tokens_per_sec=tokens_per_sec, cache_hit=cache_hit, **labels)
+
+    def cache(self, cache, hit, **labels):
+        with self.lock:
+            if hit:
+                self.cache_hits[cache] += 1
+            else:
+                self.cache_misses[cache] += 1
+            self._write("cache", cache=cache, hit=hit, **labels)
+
+    def escalation(self, field, reason):
+        # reason is None when the small model's answer was kept (see model_cascade)
+        with self.lock:
+            self.cascade_answers[field] += 1
+            if reason is not None:
+                self.escalations[field] += 1
+            self._write("cascade", field=field, escalated=reason is not None, reason=reason)
+
+    def observe_stage(self, stage, item, seconds):
+        # Called by run_pipeline for every finished stage of every item
+        self.record_stage("pipeline_" + stage, seconds, file=os.path.basename(str(item)))
+
+    def observe_failure(self, stage, item, error):
+        # Called by run_pipeline for every item failing a stage
+        with self.lock:
+            self.stage_errors["pipeline_" + stage] += 1
+            self._write("failure", stage="pipeline_" + stage, file=os.path.basename(str(item)), error=str(error))
+
+    def observe_queue(self, queue, depth):
+        with self.lock:
+            self.queue_depth[queue] = depth
+            self._write("queue", queue=queue, depth=depth)
+
+    def flush(self):
+        with self.lock:
+            lines = []
+
+            def metric(name, kind, help_text, values, label):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(values.items()):
+                    escaped = str(key).replace("\\", "\\\\").replace('"', '\\"')
+                    lines.append(f'{name}{{{label}="{escaped}"}} {value}')
+
+            metric("cv_stage_seconds_total", "counter", "Wall time spent per stage.", self.stage_seconds, "stage")
+            metric("cv_stage_total", "counter", "Completed stage runs.", self.stage_count, "stage")
+            metric("cv_stage_errors_total", "counter", "Failed stage runs.", self.stage_errors, "stage")
+            metric("cv_field_seconds_total", "counter", "Wall time spent per field query.", self.field_seconds, "field")
+            metric("cv_field_answers_total", "counter", "Field answers, from the LLM or the regex rules.", self.field_count, "field")
+            metric("cv_field_prompt_tokens_total", "counter", "Prompt tokens sent per field.", self.prompt_tokens, "field")
+            metric("cv_field_generated_tokens_total", "counter", "Tokens generated per field.", self.generated_tokens, "field")
+            metric("cv_cache_hits_total", "counter", "Cache hits per cache.", self.cache_hits, "cache")
+            metric("cv_cache_misses_total", "counter", "Cache misses per cache.", self.cache_misses, "cache")
+            metric("cv_field_cascade_total", "counter", "Fields first answered by the small model.", self.cascade_answers, "field")
+            metric("cv_field_escalations_total", "counter", "Fields escalated to the larger model.", self.escalations, "field")
+            metric("cv_queue_depth", "gauge", "Last observed pipeline queue depth.", self.queue_depth, "queue")
+            body = "\n".join(lines) + "\n"
+        # The textfile collector may read at any moment, so swap the file in atomically
+        tmp_file = self.prom_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(body)
+        os.replace(tmp_file, self.prom_file)
+
+    def close(self):
+        self.flush()
+        self.jsonl.close()
+
+
+def make_metrics(metrics_dir):
+    if not metrics_dir:
+        return NullMetrics()
+    os.makedirs(metrics_dir, exist_ok=True)
+    return Metrics(os.path.join(metrics_dir, "cv_metrics.jsonl"), os.path.join(metrics_dir, "cv_processor.prom"))
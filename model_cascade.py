@@ -0,0 +1,114 @@
+import re
+import threading
+
+from field_rules import CNIC_RE, DATE_RE, EMAIL_RE, PHONE_RE
+
+# Answers meaning "not in the resume"; fine for optional columns, suspicious for the name
+MISSING_RE = re.compile(r"^\W*(?:n/?a|none|nil|null|not\s+(?:mentioned|available|provided|found|given|specified))\W*$",
+                        re.IGNORECASE)
+# Columns every resume has, so "N/A" from the small model is escalated too
+REQUIRED_FIELDS = {"Candidate Name & CNIC No"}
+_ANY_PHONE_RE = re.compile(r"\+?\d[\d\s()-]{6,}\d")
+_DURATION_RE = re.compile(r"\d+(?:\.\d+)?\s*(?:years?|yrs?|months?)", re.IGNORECASE)
+
+
+def _valid_name(answer):
+    # A name (letters), and if it carries what looks like a CNIC, a well-formed one
+    if not re.search(r"[A-Za-z]{2,}", answer):
+        return False
+    return not re.search(r"\d{5}", answer) or bool(CNIC_RE.search(answer)) or len(re.sub(r"\D", "", answer)) == 13
+
+
+# Cheap shape checks per column; columns without one only need a non-empty answer
+FIELD_VALIDATORS = {
+    "Candidate Name & CNIC No": _valid_name,
+    "Email": lambda answer: bool(EMAIL_RE.search(answer)),
+    "Contact Number": lambda answer: bool(PHONE_RE.search(answer) or _ANY_PHONE_RE.search(answer)),
+    "DOB": lambda answer: bool(DATE_RE.search(answer)),
+    "Total Experience": lambda answer: bool(_DURATION_RE.search(answer)),
+}
+
+
+def validate_answer(field, answer):
+    """None when `answer` looks acceptable for `field`, else the reason to escalate it."""
+    answer = (answer or "").strip()
+    if not answer:
+        return "empty"
+    if MISSING_RE.match(answer):
+        return "missing" if field in REQUIRED_FIELDS else None
+    validator = FIELD_VALIDATORS.get(field)
+    if validator is not None and not validator(answer):
+        return "shape"
+    return None
+
+
+class ModelCascade:
+    """
+    Small model first, escalating one field at a time.
+
+    `ask(tier)` returns a field's answer from model `tier` (0 = cheapest). The next tier is only
+    asked when the answer fails validate_answer(); with a single tier nothing is validated. Per
+    field it counts how often the cheapest answer was escalated, and reports it to `metrics`.
+    """
+
+    def __init__(self, tiers=1, metrics=None):
+        self.tiers = tiers
+        self.metrics = metrics
+        self.lock = threading.Lock()
+        self.asked = {}
+        self.escalated = {}
+
+    @property
+    def enabled(self):
+        return self.tiers > 1
+
+    def _record(self, field, reason):
+        with self.lock:
+            self.asked[field] = self.asked.get(field, 0) + 1
+            if reason is not None:
+                self.escalated[field] = self.escalated.get(field, 0) + 1
+        if self.metrics is not None:
+            self.metrics.escalation(field, reason)
+
+    def answer(self, field, ask):
+        answer = ask(0)
+        for tier in range(1, self.tiers):
+            reason = validate_answer(field, answer)
+            if tier == 1:
+                self._record(field, reason)
+            if reason is None:
+                break
+            answer = ask(tier) or answer
+        return answer
+
+    async def answer_async(self, field, ask):
+        answer = await ask(0)
+        for tier in range(1, self.tiers):
+            reason = validate_answer(field, answer)
+            if tier == 1:
+                self._record(field, reason)
+            if reason is None:
+                break
+            answer = await ask(tier) or answer
+        return answer
+
+    def failing(self, answers):
+        """Fields of a batch answer (single-call JSON) that should be re-asked through the cascade."""
+        if not self.enabled:
+            return []
+        failed = [field for field, answer in answers.items() if validate_answer(field, answer) is not None]
+        for field in answers:
+            if field not in failed:
+                self._record(field, None)  # the failed ones are counted when re-asked through answer()
+        return failed
+
+    def rates(self):
+        with self.lock:
+            return {field: self.escalated.get(field, 0) / asked for field, asked in self.asked.items()}
+
+    def report(self):
+        if not self.enabled or not self.asked:
+            return
+        rates = self.rates()
+        print("📈 Escalation rate per field: " + ", ".join(
+            f"{field} {rate:.0%}" for field, rate in sorted(rates.items(), key=lambda item: -item[1])))
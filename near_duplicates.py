@@ -0,0 +1,177 @@
+"""
+Near-duplicate CVs: MinHash signatures over word shingles, looked up through LSH bands.
+
+Every archived CV is recorded as one JSON line (its Sr No, MinHash signature and a digest of
+the resume slice behind each column) in an append-only file next to the archive. A new CV
+whose estimated similarity to an archived one reaches the threshold reuses that row's answers
+for every column whose slice is unchanged, so only the edited sections go back to the model.
+"""
+import base64
+import json
+import os
+import re
+import threading
+import zlib
+
+from extraction_schema import FIELD_NAMES
+from section_segmenter import FIELD_SECTIONS, segment_sections
+
+INDEX_SUFFIX = ".near_duplicates.jsonl"
+SHINGLE_WORDS = 3
+# 16 bands of 4 rows: pairs from ~0.6 similarity up are almost always candidates; the estimate
+# over all 64 values then decides against the threshold
+NUM_PERM = 64
+BANDS = 16
+MERSENNE_PRIME = (1 << 31) - 1
+_WORD_RE = re.compile(r"\w+")
+
+
+def _permutations():
+    import numpy as np
+    rng = np.random.RandomState(1)  # fixed, so signatures written by other processes compare
+    a = rng.randint(1, MERSENNE_PRIME, NUM_PERM).astype(np.uint64)
+    b = rng.randint(0, MERSENNE_PRIME, NUM_PERM).astype(np.uint64)
+    return a, b
+
+
+def index_path(archive_folder):
+    # Beside the archive, not in it, so the archive holds only archived CVs (archive -> archive.near_duplicates.jsonl)
+    return os.path.normpath(archive_folder) + INDEX_SUFFIX
+
+
+def shingle_hashes(text):
+    words = _WORD_RE.findall(text.lower())
+    if len(words) > SHINGLE_WORDS:
+        words = [" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)]
+    return {zlib.crc32(shingle.encode("utf-8")) % MERSENNE_PRIME for shingle in words}
+
+
+def field_digests(text):
+    """CRC of the whitespace-normalised slice each column is asked from, in FIELD_NAMES order."""
+    sections = segment_sections(text)
+    digests = []
+    for field in FIELD_NAMES:
+        groups = FIELD_SECTIONS.get(field, ())
+        part = "\n".join(text[start:end] for group, _, start, end in sections if group in groups)
+        if len(sections) < 2 or not part.strip():
+            part = text  # the field is asked from the whole resume (see pack_context)
+        digests.append(f"{zlib.crc32(' '.join(part.split()).encode('utf-8')):08x}")
+    return "".join(digests)
+
+
+def unchanged_fields(old_digests, new_digests):
+    if len(old_digests) != len(new_digests):
+        return []
+    return [field for i, field in enumerate(FIELD_NAMES) if old_digests[i * 8:i * 8 + 8] == new_digests[i * 8:i * 8 + 8]]
+
+
+class NearDuplicateIndex:
+    """
+    Incremental MinHash/LSH index persisted as JSON lines.
+
+    Buckets live in memory (one dict keyed by band hash), so a lookup is BANDS dict hits plus a
+    comparison against the few candidates. Several processors can share the file: each appends
+    its own lines and picks up the others' before every lookup.
+    """
+
+    def __init__(self, index_file, threshold=0.8):
+        self.index_file = index_file
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.permutations = None
+        self.refs = []
+        self.digests = []
+        self.signatures = None
+        self.buckets = {}
+        self.known = set()
+        self.offset = 0  # the file is read on the first lookup or add, not at startup
+
+    def fingerprint(self, text):
+        """{signature, digests} of a CV text, JSON-serialisable so it can be journaled."""
+        import numpy as np
+        if self.permutations is None:
+            self.permutations = _permutations()
+        a, b = self.permutations
+        hashes = shingle_hashes(text)
+        if hashes:
+            values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+            signature = ((values[:, None] * a + b) % MERSENNE_PRIME).min(axis=0).astype(np.uint32)
+        else:
+            signature = np.full(NUM_PERM, MERSENNE_PRIME, dtype=np.uint32)
+        return {"signature": base64.b64encode(signature.tobytes()).decode("ascii"), "digests": field_digests(text)}
+
+    def _bands(self, signature):
+        rows = NUM_PERM // BANDS
+        return [hash((band, signature[band * rows:(band + 1) * rows].tobytes())) for band in range(BANDS)]
+
+    def _load(self, ref, signature, digests):
+        if ref in self.known:
+            return
+        import numpy as np
+        position = len(self.refs)
+        if self.signatures is None:
+            self.signatures = np.empty((1024, NUM_PERM), dtype=np.uint32)
+        elif position == len(self.signatures):
+            self.signatures = np.concatenate([self.signatures, np.empty_like(self.signatures)])
+        self.signatures[position] = signature
+        self.refs.append(ref)
+        self.digests.append(digests)
+        self.known.add(ref)
+        for key in self._bands(signature):
+            self.buckets.setdefault(key, []).append(position)
+
+    def _refresh(self):
+        # Read whatever this and other processes appended since the last call; a torn last line waits
+        import numpy as np
+        try:
+            if os.path.getsize(self.index_file) <= self.offset:
+                return
+        except FileNotFoundError:
+            return
+        with open(self.index_file, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            try:
+                entry = json.loads(line)
+                signature = np.frombuffer(base64.b64decode(entry["signature"]), dtype=np.uint32)
+            except (ValueError, KeyError):
+                continue
+            if len(signature) == NUM_PERM:
+                self._load(entry["ref"], signature, entry.get("digests", ""))
+        self.offset += end
+
+    def lookup(self, fingerprint):
+        """(ref, similarity, digests) of the most similar indexed CV at or above the threshold, or None."""
+        import numpy as np
+        signature = np.frombuffer(base64.b64decode(fingerprint["signature"]), dtype=np.uint32)
+        with self.lock:
+            self._refresh()
+            candidates = set()
+            for key in self._bands(signature):
+                candidates.update(self.buckets.get(key, ()))
+            if not candidates:
+                return None
+            positions = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            similarity = (self.signatures[positions] == signature).mean(axis=1)
+            best = int(similarity.argmax())
+            if similarity[best] < self.threshold:
+                return None
+            position = positions[best]
+            return self.refs[position], float(similarity[best]), self.digests[position]
+
+    def add(self, ref, fingerprint):
+        """Index an archived CV under `ref` (its Sr No); adding a ref twice is a no-op."""
+        with self.lock:
+            self._refresh()
+            if ref in self.known:
+                return
+            line = json.dumps({"ref": ref, **fingerprint}) + "\n"
+            # One O_APPEND write per entry, so lines from concurrent processors do not interleave
+            fd = os.open(self.index_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line.encode("utf-8"))
+            finally:
+                os.close(fd)
+            self._refresh()
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class OllamaError(Exception):
+    pass
+
+
+class AsyncOllamaClient:
+    """
+    Minimal asyncio client for Ollama's /api/chat.
+
+    One pooled aiohttp session is reused for every request; a semaphore caps the number of
+    requests in flight (match it to the server's OLLAMA_NUM_PARALLEL), and each request is
+    retried with exponential backoff on timeouts, connection errors and 429/5xx replies.
+    """
+
+    def __init__(self, model, base_url="http://localhost:11434", max_in_flight=4, timeout=300,
+                 retries=2, backoff=1.0, options=None):
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.options = options or {}
+        self.session = None
+        self.semaphore = None
+
+    async def _session(self):
+        if self.session is None:
+            import aiohttp
+            self.semaphore = asyncio.Semaphore(self.max_in_flight)
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_in_flight, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self.session
+
+    async def chat(self, messages, format=None, **options):
+        """Send one chat request and return the response payload (message content plus eval counts)."""
+        import aiohttp
+        session = await self._session()
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "stream": False,
+            "options": {**self.options, **options},
+        }
+        if format is not None:
+            payload["format"] = format
+
+        for attempt in range(self.retries + 1):
+            try:
+                # Held per attempt, so a request sleeping before its retry leaves its slot to others
+                async with self.semaphore, session.post(self.base_url + "/api/chat", json=payload) as resp:
+                    if resp.status in RETRY_STATUSES:
+                        raise OllamaError(f"HTTP {resp.status}: {await resp.text()}")
+                    if resp.status != 200:
+                        # Bad request / unknown model: retrying will not help
+                        raise ValueError(f"Ollama returned HTTP {resp.status}: {await resp.text()}")
+                    return await resp.json()
+            except (OllamaError, aiohttp.ClientError, asyncio.TimeoutError) as error:
+                if attempt == self.retries:
+                    raise OllamaError(f"Ollama request failed after {attempt + 1} attempt(s): {error!r}") from error
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def chat_content(self, messages, format=None, **options):
+        data = await self.chat(messages, format=format, **options)
+        return data["message"]["content"].strip()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class BackgroundLoop:
+    """An event loop on a daemon thread, so synchronous pipeline workers can share one async client."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="ollama-loop", daemon=True)
+        self.thread.start()
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
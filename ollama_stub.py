@@ -0,0 +1,92 @@
+"""
+Local stand-in for an Ollama server, for exercising the async extraction path without a model.
+
+    python ollama_stub.py --port 11500 --latency 0.5 --fail-rate 0.1
+
+Speaks POST /api/chat (non-streaming) and GET /api/tags. Replies are deterministic: plain
+requests get --reply, format="json" requests get an object with every quoted key from the prompt.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client connection reuse is exercised
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send(200, {"models": [{"name": self.server.model}]})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/api/chat":
+            self._send(404, {"error": "not found"})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with self.server.lock:
+            self.server.in_flight += 1
+            self.server.peak_in_flight = max(self.server.peak_in_flight, self.server.in_flight)
+            self.server.requests += 1
+        try:
+            time.sleep(self.server.latency)
+            if self.server.fail_rate and random.random() < self.server.fail_rate:
+                self._send(503, {"error": "stub: simulated overload"})
+                return
+            prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+            if body.get("format") is not None:
+                keys = re.findall(r'"([^"]+)"', prompt.split("these keys:", 1)[-1])
+                content = json.dumps({key: self.server.reply for key in keys})
+            else:
+                content = self.server.reply
+            self._send(200, {
+                "model": body.get("model", self.server.model),
+                "message": {"role": "assistant", "content": content},
+                "done": True,
+                "prompt_eval_count": len(prompt) // 4,
+                "eval_count": max(1, len(content) // 4),
+            })
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_server(host="127.0.0.1", port=11500, model="stub", latency=0.0, fail_rate=0.0, reply="N/A"):
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.model = model
+    server.latency = latency
+    server.fail_rate = fail_rate
+    server.reply = reply
+    server.lock = threading.Lock()
+    server.in_flight = server.peak_in_flight = server.requests = 0
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Ollama chat server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--reply", default="N/A")
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, latency=args.latency, fail_rate=args.fail_rate, reply=args.reply)
+    print(f"🧪 Stub Ollama listening on http://{args.host}:{args.port}")
+    server.serve_forever()
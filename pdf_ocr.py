@@ -0,0 +1,146 @@
+"""
+OCR fallback for pages without a text layer (scanned CVs), using Tesseract.
+
+Only pages whose extracted text is nearly empty and that carry an image are rendered and sent
+to Tesseract, so text PDFs never touch it. Pages are OCRed in a process pool, a few at a time,
+until the text budget is filled, and the text is cached by a hash of the page's image data.
+Needs pytesseract and the tesseract binary; pypdfium2 (installed with pdfplumber) renders.
+"""
+import hashlib
+import os
+import re
+
+from pipeline import process_pool
+
+# Pages with fewer non-blank characters than this are treated as having no text layer
+MIN_PAGE_CHARS = 25
+# Longest rendered side in pixels whatever the DPI, so an oversized page cannot exhaust memory
+MAX_RENDER_PIXELS = 5000
+# Tesseract is killed after this many seconds on one page
+PAGE_TIMEOUT = 30
+
+_unavailable = None  # why OCR cannot run in this process; checked once
+
+
+def sparse_text(page_text):
+    return len(re.sub(r"\s+", "", page_text or "")) < MIN_PAGE_CHARS
+
+
+def ocr_unavailable():
+    """None when Tesseract can be used here, else the reason it cannot."""
+    global _unavailable
+    if _unavailable is None:
+        try:
+            import pypdfium2  # noqa: F401
+            import pytesseract
+            pytesseract.get_tesseract_version()
+            _unavailable = ""
+        except Exception as error:  # ImportError, or TesseractNotFoundError when the binary is missing
+            _unavailable = f"{type(error).__name__}: {error}"
+            print(f"⚠️ OCR unavailable ({_unavailable}); image-only pages stay empty")
+    return _unavailable or None
+
+
+def page_image_sha256(pdf, number):
+    """Hash of the raw image data on a page, or None when it has no image (nothing to OCR)."""
+    import pypdfium2.raw as pdfium_c
+    page = pdf[number]
+    try:
+        digest, found = hashlib.sha256(), False
+        for image in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_IMAGE]):
+            digest.update(bytes(image.get_data()))
+            found = True
+        return digest.hexdigest() if found else None
+    finally:
+        page.close()
+
+
+def ocr_page(file_path, number, dpi, lang):
+    """Render one page (0-based) and return Tesseract's text; runs in an OCR pool worker."""
+    import pypdfium2 as pdfium
+    import pytesseract
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        page = pdf[number]
+        width, height = page.get_size()  # in points, 72 per inch
+        scale = min(dpi / 72, MAX_RENDER_PIXELS / max(width, height, 1))
+        image = page.render(scale=scale).to_pil().convert("L")
+        page.close()
+    finally:
+        pdf.close()
+    return pytesseract.image_to_string(image, lang=lang, timeout=PAGE_TIMEOUT)
+
+
+class PageOcr:
+    """
+    OCR settings for the parse stage; picklable, so it is passed to the pool with the extractor.
+
+    `dpi` is the render resolution, `max_pages` the most pages OCRed per CV and `workers` the size
+    of the OCR process pool, started only when a CV has more than one page to OCR. With
+    `cache_file` (the CVCache database) OCR text is reused for pages with the same image data.
+    """
+
+    def __init__(self, dpi=200, max_pages=5, workers=2, cache_file=None, lang="eng"):
+        self.dpi = dpi
+        self.max_pages = max_pages
+        self.workers = workers
+        self.cache_file = cache_file
+        self.lang = lang
+
+    @property
+    def key(self):
+        return f"tesseract-{self.lang}-dpi-{self.dpi}"
+
+    def fill(self, file_path, pages, max_chars=None):
+        """`pages` with the text of image-only pages replaced by OCR, stopping once max_chars is reached."""
+        sparse = [number for number, text in enumerate(pages) if sparse_text(text)]
+        if not sparse or ocr_unavailable():
+            return pages
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            hashes = {number: page_image_sha256(pdf, number) for number in sparse}
+        finally:
+            pdf.close()
+        todo = [number for number in sparse if hashes[number]][:self.max_pages]
+        if not todo:
+            return pages
+
+        from cv_cache import CVCache
+        cache = CVCache(self.cache_file) if self.cache_file else None
+        pages = list(pages)
+        pool, recognised = None, 0
+        try:
+            step = max(1, self.workers)
+            for batch_start in range(0, len(todo), step):
+                batch = todo[batch_start:batch_start + step]
+                texts = {number: cache.get_ocr(hashes[number], self.key) if cache else None for number in batch}
+                missing = [number for number in batch if texts[number] is None]
+                if pool is None and self.workers > 1 and len(missing) > 1:
+                    pool = process_pool(min(self.workers, len(todo)))
+                futures = {number: pool.submit(ocr_page, file_path, number, self.dpi, self.lang)
+                           for number in missing} if pool is not None else {}
+                for number in missing:
+                    try:
+                        texts[number] = (futures[number].result() if number in futures
+                                         else ocr_page(file_path, number, self.dpi, self.lang))
+                    except Exception as error:
+                        print(f"⚠️ OCR failed on page {number + 1} of {os.path.basename(file_path)}: {error}")
+                        continue
+                    recognised += 1
+                    if cache is not None:
+                        cache.put_ocr(hashes[number], self.key, texts[number])
+                for number in batch:
+                    if texts[number]:
+                        pages[number] = texts[number]
+                if max_chars is not None and sum(len(text) + 1 for text in pages) >= max_chars:
+                    break
+        finally:
+            if pool is not None:
+                # On a time-limit interrupt, don't wait for queued pages; tesseract has its own timeout
+                pool.shutdown(wait=False, cancel_futures=True)
+            if cache is not None:
+                cache.close()
+        print(f"🔎 OCR on {os.path.basename(file_path)}: {recognised} image-only page(s) recognised, "
+              f"{len(todo) - recognised} cached or failed")
+        return pages
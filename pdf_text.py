@@ -0,0 +1,161 @@
+import os
+import signal
+import threading
+from contextlib import contextmanager
+
+# Fastest first; the next backend is only tried when one fails or returns no usable text
+DEFAULT_BACKENDS = ("PyPDF2", "pdfplumber")
+
+
+class ExtractionLimitError(Exception):
+    pass
+
+
+def iter_pages(file_path, backend, max_pages=None):
+    """Yield the text of each page in turn; only the current page is held in memory."""
+    if backend == "PyPDF2":
+        from PyPDF2 import PdfReader
+        reader = PdfReader(file_path)
+        for number, page in enumerate(reader.pages):
+            if max_pages is not None and number >= max_pages:
+                return
+            yield page.extract_text() or ""
+    elif backend == "pdfplumber":
+        import pdfplumber
+        with pdfplumber.open(file_path) as pdf:
+            for number, page in enumerate(pdf.pages):
+                if max_pages is not None and number >= max_pages:
+                    return
+                yield page.extract_text() or ""
+                # Drop the parsed layout objects of pages we are done with
+                (getattr(page, "close", None) or page.flush_cache)()
+    else:
+        raise ValueError(f"Unknown PDF backend: {backend}")
+
+
+def read_page_texts(file_path, backend, max_chars=None, max_pages=None):
+    """Text of each of the first pages, stopping as soon as `max_chars` characters have been read."""
+    pages, size = [], 0
+    for page_text in iter_pages(file_path, backend, max_pages):
+        pages.append(page_text)
+        size += len(page_text) + 1
+        if max_chars is not None and size >= max_chars:
+            break
+    return pages
+
+
+def join_pages(pages, max_chars=None):
+    text = "\n".join(pages)
+    return text[:max_chars] if max_chars is not None else text
+
+
+def read_pages(file_path, backend, max_chars=None, max_pages=None):
+    return join_pages(read_page_texts(file_path, backend, max_chars, max_pages), max_chars)
+
+
+def looks_garbled(text):
+    # PyPDF2 sometimes loses the spaces between words on tightly kerned layouts
+    sample = text[:4000]
+    return len(sample) > 200 and sample.count(" ") + sample.count("\n") < len(sample) / 25
+
+
+def extract_pdf_text(file_path, backends=DEFAULT_BACKENDS, max_chars=None, max_pages=None, ocr=None):
+    """
+    Text of a PDF from the first backend that gives usable text, falling back to the next one.
+
+    With `ocr` (a pdf_ocr.PageOcr), pages without a text layer are OCRed. A PDF that still has
+    no text at all is an error rather than an empty resume for the model to guess at.
+    """
+    name = os.path.basename(file_path)
+    best, last_error = None, None
+    for position, backend in enumerate(backends):
+        try:
+            pages = read_page_texts(file_path, backend, max_chars, max_pages)
+            if ocr is not None:
+                pages = ocr.fill(file_path, pages, max_chars)
+            text = join_pages(pages, max_chars)
+        except (ExtractionLimitError, MemoryError):
+            raise  # a pathological file would blow the cap on every backend
+        except ImportError as error:
+            last_error = error
+            continue
+        except Exception as error:
+            last_error = error
+            print(f"⚠️ {backend} failed on {name}: {error}")
+            continue
+        if text.strip() and not looks_garbled(text):
+            return text
+        if best is None or len(text.strip()) > len(best.strip()):
+            best = text
+        if position + 1 < len(backends):
+            print(f"↪️ {backend} gave {'garbled' if text.strip() else 'no'} text for {name}; trying {backends[position + 1]}")
+    if best is None:
+        raise last_error or ValueError(f"No PDF backend could read {name}")
+    if ocr is not None and not best.strip():
+        raise ValueError(f"No text in {name}: image-only pages and OCR gave nothing")
+    return best
+
+
+def _address_space_bytes():
+    # Current virtual size; the cap is added on top, since forked workers inherit the parent's mappings
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+@contextmanager
+def resource_limits(seconds=None, memory_mb=None):
+    """
+    Wall-clock and memory caps for the enclosed block, raising ExtractionLimitError when hit.
+
+    The time cap uses SIGALRM, so it only applies on the main thread on POSIX. The memory cap
+    lowers RLIMIT_AS and only applies inside a worker process: capping the main process would
+    also cap the loaded model.
+    """
+    use_alarm = bool(seconds) and hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+    rlimit = None
+    if memory_mb:
+        import multiprocessing
+        current = _address_space_bytes()
+        if multiprocessing.parent_process() is not None and current is not None:
+            import resource
+            rlimit = resource.getrlimit(resource.RLIMIT_AS)
+            limit = current + memory_mb * 1024 * 1024
+            if rlimit[1] != resource.RLIM_INFINITY:
+                limit = min(limit, rlimit[1])
+            resource.setrlimit(resource.RLIMIT_AS, (limit, rlimit[1]))
+
+    def on_alarm(signum, frame):
+        raise ExtractionLimitError(f"PDF extraction took longer than {seconds}s")
+
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    except MemoryError:
+        raise ExtractionLimitError(f"PDF extraction needed more than {memory_mb} MB") from None
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+        if rlimit is not None:
+            import resource
+            resource.setrlimit(resource.RLIMIT_AS, rlimit)
+
+
+def extract_cv_text(file_path, backends=DEFAULT_BACKENDS, max_chars=None, max_pages=None, time_limit=None,
+                    memory_limit_mb=None, ocr=None):
+    """Pipeline parse stage extractor: streaming, budget-bounded extraction under per-file caps."""
+    with resource_limits(time_limit, memory_limit_mb):
+        return extract_pdf_text(file_path, backends, max_chars, max_pages, ocr)
+
+
+def extractor_key(backends=DEFAULT_BACKENDS, max_chars=None, max_pages=None, ocr=None):
+    # Cached text depends on the backends, on where extraction stopped and on the OCR settings
+    key = f"{'+'.join(backends)}|chars-{max_chars}|pages-{max_pages}"
+    if ocr is not None:
+        key += f"|ocr-{ocr.key}-pages-{ocr.max_pages}"
+    return key
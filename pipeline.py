@@ -0,0 +1,148 @@
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+_DONE = object()
+
+
+def process_pool(max_workers):
+    """
+    ProcessPoolExecutor whose workers are not fork()ed from this process. Pools here start while
+    other threads (LLM workers, the writer, the claims heartbeat) run, and a forked child inherits
+    any lock one of them held at that moment (stdout, sqlite, logging), so its next print could
+    hang forever. forkserver forks from a clean single-threaded server; spawn where it is missing.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+
+
+def _timed(parse, item):
+    # Runs in the pool worker, so the parse time excludes queueing and pickling
+    start = time.perf_counter()
+    result = parse(item)
+    return time.perf_counter() - start, result
+
+
+def run_pipeline(items, parse, extract, write, parse_workers=2, llm_workers=1, queue_size=4, stats=None,
+                 monitor=None):
+    """
+    Runs every item through three overlapping stages:
+
+    parse(item) -> parsed            process pool (parse must be a picklable module-level function)
+    extract(item, parsed) -> result  llm_workers threads fed from a bounded queue
+    write(item, result)              a single writer thread fed from a bounded queue
+
+    Full queues block the stage in front of them, so memory stays bounded and a backlog
+    drains at the pace of the slowest stage. Returns {item: exception} for failed items.
+
+    If `stats` is a dict it is filled with {"parse"|"extract"|"write": {"count", "seconds"}},
+    the busy time of each stage summed over its workers. `monitor` (see metrics.Metrics) is told
+    about every finished stage, every failed item and the queue depths as items move through.
+    """
+    llm_queue = queue.Queue(maxsize=queue_size)
+    write_queue = queue.Queue(maxsize=queue_size)
+    errors = {}
+    errors_lock = threading.Lock()
+    stage_stats = {stage: {"count": 0, "seconds": 0.0} for stage in ("parse", "extract", "write")}
+
+    def record(stage, item, seconds):
+        with errors_lock:
+            stage_stats[stage]["count"] += 1
+            stage_stats[stage]["seconds"] += seconds
+        if monitor is not None:
+            monitor.observe_stage(stage, item, seconds)
+
+    def put(target, name, job):
+        target.put(job)
+        if monitor is not None:
+            monitor.observe_queue(name, target.qsize())
+
+    def fail(stage, item, error):
+        print(f"❌ Failed: {item}: {error}")
+        with errors_lock:
+            errors[item] = error
+        if monitor is not None:
+            monitor.observe_failure(stage, item, error)
+
+    def llm_worker():
+        while True:
+            job = llm_queue.get()
+            if job is _DONE:
+                return
+            item, parsed = job
+            start = time.perf_counter()
+            try:
+                result = extract(item, parsed)
+            except Exception as error:
+                fail("extract", item, error)
+                continue
+            record("extract", item, time.perf_counter() - start)
+            put(write_queue, "write", (item, result))
+
+    def writer():
+        while True:
+            job = write_queue.get()
+            if job is _DONE:
+                return
+            item, result = job
+            start = time.perf_counter()
+            try:
+                write(item, result)
+            except Exception as error:
+                fail("write", item, error)
+                continue
+            record("write", item, time.perf_counter() - start)
+
+    llm_threads = [threading.Thread(target=llm_worker, name=f"llm-{i}", daemon=True)
+                   for i in range(max(1, llm_workers))]
+    writer_thread = threading.Thread(target=writer, name="writer", daemon=True)
+    for thread in llm_threads:
+        thread.start()
+    writer_thread.start()
+
+    try:
+        if parse_workers <= 0:
+            for item in items:
+                try:
+                    seconds, parsed = _timed(parse, item)
+                except Exception as error:
+                    fail("parse", item, error)
+                    continue
+                record("parse", item, seconds)
+                put(llm_queue, "llm", (item, parsed))
+        else:
+            with process_pool(parse_workers) as pool:
+                pending = {}
+
+                def collect(return_when):
+                    done, _ = wait(pending, return_when=return_when)
+                    for future in done:
+                        item = pending.pop(future)
+                        try:
+                            seconds, parsed = future.result()
+                        except Exception as error:
+                            fail("parse", item, error)
+                            continue
+                        record("parse", item, seconds)
+                        put(llm_queue, "llm", (item, parsed))  # blocks while the LLM stage is saturated
+
+                for item in items:
+                    # Keep at most one queued job per worker ahead of the pool
+                    if len(pending) >= 2 * parse_workers:
+                        collect(FIRST_COMPLETED)
+                    pending[pool.submit(_timed, parse, item)] = item
+                while pending:
+                    collect(FIRST_COMPLETED)
+    finally:
+        for _ in llm_threads:
+            llm_queue.put(_DONE)
+        for thread in llm_threads:
+            thread.join()
+        write_queue.put(_DONE)
+        writer_thread.join()
+        if stats is not None:
+            stats.update(stage_stats)
+
+    return errors
@@ -0,0 +1,38 @@
+from collections import OrderedDict
+
+
+class PrefixCache:
+    """Evaluates a shared prompt prefix once and branches every completion from its saved llama.cpp state."""
+
+    def __init__(self, llama, max_snapshots=1):
+        self.llama = llama  # llama_cpp.Llama (LlamaCpp(...).client)
+        self.max_snapshots = max_snapshots
+        self.snapshots = OrderedDict()
+        # Details of the last complete() call, for instrumentation
+        self.last_hit = False
+        self.last_usage = None
+
+    def prime(self, prefix):
+        """Make sure a snapshot of `prefix` exists; returns True if it was already there."""
+        if prefix in self.snapshots:
+            self.snapshots.move_to_end(prefix)
+            return True
+        tokens = self.llama.tokenize(prefix.encode("utf-8"), special=True)
+        self.llama.reset()
+        self.llama.eval(tokens)
+        self.snapshots[prefix] = self.llama.save_state()
+        while len(self.snapshots) > self.max_snapshots:
+            self.snapshots.popitem(last=False)
+        return False
+
+    def complete(self, prefix, suffix, **kwargs):
+        self.last_hit = self.prime(prefix)
+        # Restoring the snapshot puts the prefix tokens back in the KV cache, so llama.cpp's
+        # longest-prefix match only evaluates the suffix of the full prompt
+        self.llama.load_state(self.snapshots[prefix])
+        result = self.llama.create_completion(prefix + suffix, **kwargs)
+        self.last_usage = result.get("usage")
+        return result["choices"][0]["text"]
+
+    def clear(self):
+        self.snapshots.clear()
@@ -0,0 +1,352 @@
+"""
+Backend-independent half of the CV processors: inbox scanning, the parse/extract/write pipeline,
+journaling, caching, near-duplicate reuse, the result store and archiving.
+
+app.py (llama.cpp) and app_2.py (Ollama) subclass BaseCVProcessor and only add the model calls:
+load_models(), the model_status(**options) classmethod, extract_info_with_llama(text, answered,
+on_answer) and close() for whatever the models hold.
+"""
+import contextlib
+import inspect
+import os
+import shutil
+import time
+from functools import partial
+
+from context_budget import context_size, pack_context, text_char_budget
+from cv_cache import CVCache, load_cv_text
+from experience_dates import total_experience
+from extraction_schema import FIELD_NAMES
+from field_specs import longest_answer
+from folder_watcher import FolderWatcher, inotify_available
+from job_journal import JobJournal
+from metrics import make_metrics
+from near_duplicates import NearDuplicateIndex, index_path, unchanged_fields
+from pdf_ocr import PageOcr
+from pdf_text import extract_cv_text, extract_pdf_text, extractor_key
+from pipeline import run_pipeline
+from result_store import ResultStore
+from work_claims import FailureCounts, WorkClaims
+
+# PDF text backends, fastest first; pdfplumber only runs when PyPDF2 fails or gives no usable text
+TEXT_BACKENDS = ("PyPDF2", "pdfplumber")
+# In watch mode, seconds without a settled file after which the inbox counts as drained
+EXPORT_QUIET_SECONDS = 2
+
+
+class BaseCVProcessor:
+    # Modules needed at run time, checked by the health command; the subclasses add their model backend
+    REQUIRED_MODULES = TEXT_BACKENDS + ("openpyxl",)
+
+    def __init__(self, model_name, prompt_version, cv_folder="cvs", archive_folder="archive",
+                 output_file="output.xlsx", interval=30, db_file="results.db", extraction_mode="per_field",
+                 parse_workers=2, llm_workers=1, queue_size=4, cache_file="cv_cache.db", slice_sections=True,
+                 metrics_dir=None, resume_tokens=2800, max_new_tokens=768, constrain_output=True,
+                 claim_work=False, worker_id=None, lease_seconds=600, max_attempts=3, failed_folder="failed",
+                 max_pdf_pages=20, pdf_time_limit=60, pdf_memory_limit_mb=1024,
+                 ocr_dpi=200, ocr_max_pages=5, ocr_workers=2,
+                 journal_folder="journal", near_duplicate_threshold=0.8, export_interval=60):
+        self.cv_folder = cv_folder
+        self.archive_folder = archive_folder
+        self.output_file = output_file
+        self.interval = interval
+        # "per_field": one model call per column, "single_call": one JSON answer for all columns
+        self.extraction_mode = extraction_mode
+        # Send each field question only the resume sections that answer it
+        self.slice_sections = slice_sections
+        # Token budget for the resume text in each prompt and for each answer; n_ctx is sized from both.
+        # The single-call JSON answer is longer than max_new_tokens, so it counts towards the context too
+        self.resume_tokens = resume_tokens
+        self.max_new_tokens = max_new_tokens
+        self.n_ctx = context_size(resume_tokens, longest_answer(max_new_tokens, extraction_mode))
+        # PDF pages are streamed until there is enough text for every field context; pathological
+        # files are cut off by the per-file time and memory caps
+        self.text_chars = text_char_budget(resume_tokens)
+        self.max_pdf_pages = max_pdf_pages
+        self.pdf_time_limit = pdf_time_limit
+        self.pdf_memory_limit_mb = pdf_memory_limit_mb
+        # Pages without a text layer (scanned CVs) go to Tesseract, in a pool of ocr_workers processes per
+        # parse worker; ocr_dpi=None turns it off
+        self.ocr = PageOcr(ocr_dpi, ocr_max_pages, ocr_workers, cache_file) if ocr_dpi else None
+        self.text_extractor = extractor_key(TEXT_BACKENDS, self.text_chars, max_pdf_pages, self.ocr)
+        self.constrain_output = constrain_output
+        # Pipeline sizing: PDF parse processes, concurrent LLM workers, bounded queue length per stage
+        self.parse_workers = parse_workers
+        self.llm_workers = llm_workers
+        self.queue_size = queue_size
+        # Per-stage / per-field instrumentation (JSON lines + Prometheus textfile); off unless metrics_dir is set
+        self.metrics = make_metrics(metrics_dir)
+        # Text and field answers are cached by PDF content, so re-uploads skip parsing and the LLM
+        self.cache_file = cache_file
+        self.cache = CVCache(cache_file)
+        # output.xlsx is rebuilt from the store only after rows were written; in watch mode at most every
+        # export_interval seconds while CVs keep arriving, and once the inbox drains
+        self.export_interval = export_interval
+        self.unexported_rows = 0
+        self.last_export = time.monotonic()
+        self.model_key = (f"{model_name}|prompts-v{prompt_version}|{extraction_mode}"
+                          f"|{'sections' if slice_sections else 'full'}|ctx-{resume_tokens}"
+                          f"|{'grammar' if constrain_output else 'free'}")
+        # Held around extract_info_with_llama; a backend that cannot serve several CVs at once replaces it
+        self.llm_lock = contextlib.nullcontext()
+        self.token_counter = None
+
+        os.makedirs(self.cv_folder, exist_ok=True)
+        os.makedirs(self.archive_folder, exist_ok=True)
+        # Per-file checkpoints (field answers, stage, Sr No) so a restart resumes where it stopped
+        self.journal = JobJournal(journal_folder)
+        # MinHash index of archived CVs, so a resubmitted (edited) CV reuses the earlier answers; None turns it off
+        self.near_duplicates = None
+        if near_duplicate_threshold:
+            self.near_duplicates = NearDuplicateIndex(index_path(self.archive_folder),
+                                                      near_duplicate_threshold)
+        # Several processors can share cv_folder: each file is claimed under a lease before processing.
+        # Either way a file failing max_attempts times is moved to failed_folder instead of being retried
+        self.claims = None
+        if claim_work:
+            self.claims = WorkClaims(self.cv_folder, worker_id, lease_seconds, max_attempts=max_attempts,
+                                     failed_folder=failed_folder).start()
+            self.failures = self.claims.failures
+        else:
+            self.failures = FailureCounts(self.cv_folder, max_attempts, failed_folder)
+
+        # Results are appended to SQLite; output.xlsx is rebuilt from it in bulk. With claim_work the
+        # database may be shared by processors on other hosts, where WAL cannot be used
+        self.store = ResultStore(db_file, wal=not claim_work)
+        with self.store.lock(self.output_file):
+            if self.store.count() == 0 and os.path.exists(self.output_file):
+                imported = self.store.import_excel(self.output_file)
+                print(f"📥 Imported {imported} existing row(s) from {self.output_file}")
+
+        if not os.path.exists(self.output_file):
+            self.initialize_excel()
+
+    @classmethod
+    def default_options(cls):
+        # Constructor defaults of the subclass and of this base, for checks that must not build an instance
+        options = {}
+        for klass in (BaseCVProcessor, cls):
+            for name, parameter in inspect.signature(klass.__init__).parameters.items():
+                if parameter.default is not parameter.empty:
+                    options[name] = parameter.default
+        return options
+
+    def close(self):
+        # Called once the processor is done with (the CLI does it on exit)
+        if self.claims is not None:
+            self.claims.stop()
+        self.cache.close()
+        self.store.close()
+
+    def initialize_excel(self):
+        self.export_excel()
+
+    def extract_text_from_pdf(self, file_path):
+        # Whole document; the pipeline streams pages through extract_cv_text with a budget instead
+        return extract_pdf_text(file_path, TEXT_BACKENDS)
+
+    def computed_experience(self, output, on_answer):
+        # Summed locally from the experience date ranges; False sends the question to the model instead
+        start = time.perf_counter()
+        answer = total_experience(output.get("Experience Detail with Dates", ""))
+        if answer is None:
+            return False
+        self.metrics.field("Total Experience", time.perf_counter() - start, source="dates")
+        output["Total Experience"] = answer
+        on_answer("Total Experience", answer)
+        return True
+
+    def field_context(self, text, sections, field):
+        # The field's sections (or the whole resume), highest priority first, within the token budget
+        return pack_context(text, sections, field, self.resume_tokens, self.token_counter, self.slice_sections)
+
+    def append_to_excel(self, data, file_name=None, job_id=None, duplicate_of=None):
+        # Sr No is assigned by the store, so nothing has to be read back first
+        sr_no = self.store.append(data, file_name, job_id=job_id, duplicate_of=duplicate_of)
+        print(f"✅ CV appended for Sr No: {sr_no}")
+        return sr_no
+
+    def export_excel(self):
+        # Bulk write of the whole table with a write-only workbook
+        with self.metrics.stage("excel_export"):
+            self.store.export_excel(self.output_file)
+        self.unexported_rows = 0
+        self.last_export = time.monotonic()
+        print(f"📊 Excel updated: {self.output_file}")
+
+    def process_new_cvs(self, file_names=None, export=True):
+        # file_names comes from the folder watcher; None means a full scan of cv_folder.
+        # export=False leaves the workbook to the caller (see watch)
+        if self.claims is not None:
+            self.claims.reclaim_expired()
+        if file_names is None:
+            file_names = os.listdir(self.cv_folder)
+        files = [f for f in file_names if f.lower().endswith(".pdf")
+                 and os.path.isfile(os.path.join(self.cv_folder, f))]
+
+        if not files:
+            print("📂 No CV files found.")
+            return
+
+        # Per-file lookups keep the cost independent of the archive size
+        new_files = [f for f in files if not os.path.exists(os.path.join(self.archive_folder, f))]
+        if not new_files:
+            print("🟡 No new CVs found.")
+            return
+
+        if self.claims is None:
+            paths = [os.path.join(self.cv_folder, f) for f in new_files]
+        else:
+            # Claimed lazily as the pipeline pulls work, so a worker only holds what it is about to
+            # process and idle peers get the rest; files another processor claimed first are skipped
+            paths = (path for path in map(self.claims.claim, new_files) if path)
+        self.process_files(paths, export=export)
+
+    def process_files(self, paths, monitor=None, export=True):
+        """
+        Run PDF paths through the parse/extract/write pipeline; returns {path: error} for the failed ones.
+        With `export`, output.xlsx is rebuilt afterwards if any row was written.
+        """
+        # Per-stage busy time of the last batch (see run_pipeline)
+        self.batch_stats = {}
+        try:
+            errors = run_pipeline(
+                paths,
+                parse=partial(load_cv_text,
+                              extract=partial(extract_cv_text, backends=TEXT_BACKENDS, max_chars=self.text_chars,
+                                              max_pages=self.max_pdf_pages, time_limit=self.pdf_time_limit,
+                                              memory_limit_mb=self.pdf_memory_limit_mb, ocr=self.ocr),
+                              extractor=self.text_extractor, cache_file=self.cache_file),
+                extract=self.extract_stage,
+                write=self.save_result,
+                parse_workers=self.parse_workers,
+                llm_workers=self.llm_workers,
+                queue_size=self.queue_size,
+                stats=self.batch_stats,
+                monitor=monitor or self.metrics,
+            )
+            # Failed files get another attempt (claimed ones go back to the inbox first), or go to
+            # failed_folder after max_attempts
+            for path in errors:
+                if self.claims is not None:
+                    self.claims.release(path)
+                else:
+                    self.failures.fail(path)
+            return errors
+        finally:
+            if export and self.unexported_rows:
+                self.export_excel()
+            self.cascade.report()
+            self.metrics.flush()
+
+    def extract_stage(self, file_path, parsed):
+        pdf_sha256, text, text_cached = parsed
+        file_name = os.path.basename(file_path)
+        self.metrics.cache("text", text_cached, file=file_name)
+        job = self.journal.start(file_name, pdf_sha256, self.model_key)
+        if job["stage"] != "parsed":
+            print(f"⏩ Resuming {file_name} from the journal ({job['stage']})")
+            return job.get("info")  # only read by save_result when the row is not written yet
+        reused = self.near_duplicate_answers(file_name, text)
+        cached = self.cache.get_fields(pdf_sha256, self.model_key)
+        self.metrics.cache("fields", cached is not None, file=file_name)
+        if cached is not None:
+            print(f"⚡ Cache hit: {os.path.basename(file_path)}")
+            self.journal.stage_done(file_name, "extracted", info=cached)
+            return cached
+
+        if job["fields"]:
+            print(f"⏩ Resuming {file_name}: {len(job['fields'])} field(s) already answered")
+        print(f"🔍 Processing: {os.path.basename(file_path)}")
+        with self.llm_lock, self.metrics.stage("llm", file=file_name):
+            info = self.extract_info_with_llama(text, {**reused, **job["fields"]}, partial(self.journal.field_done, file_name))
+        # Checkpointed before the append, so a crash between append and archive resumes with the answers
+        self.journal.stage_done(file_name, "extracted", info=info)
+        self.cache.put_fields(pdf_sha256, self.model_key, info)
+        return info
+
+    def near_duplicate_answers(self, file_name, text):
+        # Answers of the most similar archived CV for every column whose resume slice is unchanged.
+        # The match is journaled, so save_result can flag the row and index this CV once it has a Sr No
+        if self.near_duplicates is None:
+            return {}
+        fingerprint = self.near_duplicates.fingerprint(text)
+        match = self.near_duplicates.lookup(fingerprint)
+        earlier = self.store.get(match[0]) if match else None
+        duplicate_of = f"Sr No {match[0]} ({match[1]:.0%} similar)" if earlier is not None else None
+        self.journal.stage_done(file_name, "parsed", fingerprint=fingerprint, duplicate_of=duplicate_of)
+        if earlier is None:
+            return {}
+        reused = {field: earlier[field] for field in unchanged_fields(match[2], fingerprint["digests"]) if field in earlier}
+        print(f"👯 {file_name} looks like {duplicate_of}; reusing {len(reused)} of {len(FIELD_NAMES)} field(s)")
+        for field in reused:
+            self.metrics.field(field, 0.0, source="duplicate")
+        return reused
+
+    def save_result(self, file_path, info):
+        # Runs on the single writer thread, so store appends and archive moves never race
+        file_name = os.path.basename(file_path)
+        if self.claims is not None and not self.claims.holds(file_path):
+            print(f"⚠️ Lease on {file_name} expired and was taken over; dropping this result")
+            return
+        # The journal's job id makes the append idempotent: after a crash between the append and the
+        # checkpoint, the retry gets the row that is already there instead of a duplicate
+        job = self.journal.get(file_name)
+        if job is None or job["stage"] != "written":
+            with self.metrics.stage("excel_append", file=file_name):
+                sr_no = self.append_to_excel(info, file_name, job["job_id"] if job else None,
+                                             job.get("duplicate_of") if job else None)
+            if job is not None:
+                self.journal.stage_done(file_name, "written", sr_no=sr_no)
+        if self.near_duplicates is not None and job is not None and job.get("fingerprint"):
+            self.near_duplicates.add(job["sr_no"], job["fingerprint"])
+        # Counted even when the row was written before a restart, as it may not have been exported yet
+        self.unexported_rows += 1
+        with self.metrics.stage("archive", file=file_name):
+            self.archive_cv(file_path)
+        self.journal.finish(file_name)
+        self.failures.forget(file_name)
+
+    def archive_cv(self, file_path):
+        file_name = os.path.basename(file_path)
+        shutil.move(file_path, os.path.join(self.archive_folder, file_name))
+        print(f"📦 Archived: {file_name}")
+
+    def run(self, watch=True):
+        print("🚀 CV Processor is now running...")
+        if watch and inotify_available():
+            self.watch()
+            return
+        while True:
+            self.process_new_cvs()
+            time.sleep(self.interval)
+
+    def watch(self):
+        print(f"👀 Watching {self.cv_folder} for new CVs...")
+        # Failed CVs stay in cv_folder without raising a new event, so every `interval` seconds a
+        # catch-up scan retries them, like the polling loop did. With claims on it runs at least every
+        # half lease, returning files of dead workers to the inbox first
+        period = self.interval
+        if self.claims is not None:
+            period = min(period, self.claims.lease_seconds / 2)
+        with FolderWatcher(self.cv_folder) as watcher:
+            # Catch up on files that arrived while we were down; the watch is already active,
+            # so anything landing during this scan is reported by the next wait()
+            self.process_new_cvs(export=False)
+            next_scan = time.monotonic() + period
+            while True:
+                # Blocks in select() until a file settles; None means events were lost, rescan.
+                # Rows waiting for the workbook shorten the wait, so a quiet inbox exports them soon
+                timeout = max(0.0, next_scan - time.monotonic())
+                if self.unexported_rows:
+                    timeout = min(timeout, EXPORT_QUIET_SECONDS)
+                names = watcher.wait(timeout)
+                if names is None or (not names and time.monotonic() >= next_scan):
+                    self.process_new_cvs(export=False)
+                    next_scan = time.monotonic() + period
+                elif names:
+                    self.process_new_cvs(names, export=False)
+                # One export per burst instead of one per CV: rebuilding the workbook costs O(rows)
+                drained = names == [] and not watcher.pending
+                if self.unexported_rows and (drained or time.monotonic() - self.last_export >= self.export_interval):
+                    self.export_excel()
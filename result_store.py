@@ -0,0 +1,153 @@
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+
+from extraction_schema import FIELD_NAMES
+
+# Set on rows whose CV is a near-duplicate of an earlier one (see near_duplicates)
+DUPLICATE_COLUMN = "Likely Duplicate Of"
+COLUMNS = ["Sr No"] + FIELD_NAMES + [DUPLICATE_COLUMN]
+
+
+@contextmanager
+def file_lock(lock_file):
+    """Exclusive lock held across processes (and hosts, where the filesystem supports it)."""
+    with open(lock_file, "a+") as f:
+        try:
+            import fcntl
+        except ImportError:  # Windows
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            return
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def stored_rows(db_file):
+    """Row count of an existing store, opened read-only so nothing is created or migrated; None if there is none."""
+    if not os.path.exists(db_file):
+        return None
+    from urllib.request import pathname2url
+    conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(db_file))}?mode=ro", uri=True)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class ResultStore:
+    """
+    Append-only SQLite table of extracted CVs; Sr No is the table's row id.
+
+    Several processors may share one db_file: every append is its own transaction and waits up
+    to `busy_timeout` seconds for the write lock. WAL needs shared memory, so pass wal=False
+    when the processors run on different hosts against a network share.
+    """
+
+    def __init__(self, db_file, wal=True, busy_timeout=30):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file, timeout=busy_timeout, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=" + ("WAL" if wal else "DELETE"))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " sr_no INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " file_name TEXT,"
+            " fields TEXT NOT NULL,"
+            " created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS results_file_name ON results (file_name)")
+        # job_id (added after the first release) lets a retried append find the row it already wrote;
+        # duplicate_of holds the near-duplicate flag
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(results)")]
+        for column in ("job_id", "duplicate_of"):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE results ADD COLUMN {column} TEXT")
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS results_job_id ON results (job_id)")
+        self.conn.commit()
+
+    def append(self, data, file_name=None, sr_no=None, job_id=None, duplicate_of=None):
+        """Insert one row and return its Sr No; with a job_id seen before, return that row's Sr No instead."""
+        fields = {key: "" if data.get(key) is None else str(data.get(key)) for key in FIELD_NAMES}
+        with self.conn:
+            verb = "INSERT OR IGNORE" if job_id is not None else "INSERT"
+            cursor = self.conn.execute(
+                verb + " INTO results (sr_no, file_name, fields, job_id, duplicate_of) VALUES (?, ?, ?, ?, ?)",
+                (sr_no, file_name, json.dumps(fields, ensure_ascii=False), job_id, duplicate_of or None),
+            )
+            if cursor.rowcount == 0 and job_id is not None:
+                return self.conn.execute("SELECT sr_no FROM results WHERE job_id = ?", (job_id,)).fetchone()[0]
+        return cursor.lastrowid
+
+    def update_field(self, field, values):
+        """Set one column on many rows, given {sr_no: value}, in a single transaction."""
+        path = "$." + json.dumps(field)
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE results SET fields = json_set(fields, ?, ?) WHERE sr_no = ?",
+                [(path, "" if value is None else str(value), int(sr_no)) for sr_no, value in values.items()],
+            )
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def get(self, sr_no):
+        """Field answers of one row, or None if there is no such row."""
+        row = self.conn.execute("SELECT fields FROM results WHERE sr_no = ?", (int(sr_no),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def rows(self):
+        cursor = self.conn.execute("SELECT sr_no, fields, duplicate_of FROM results ORDER BY sr_no")
+        for sr_no, fields, duplicate_of in cursor:
+            yield {"Sr No": sr_no, **json.loads(fields), DUPLICATE_COLUMN: duplicate_of or ""}
+
+    def import_excel(self, excel_file):
+        # One-time migration of a workbook written by the old read-modify-write code
+        from openpyxl import load_workbook
+        wb = load_workbook(excel_file, read_only=True)
+        try:
+            ws = wb.active
+            rows = ws.iter_rows(values_only=True)
+            header = [str(name) if name is not None else "" for name in next(rows, [])]
+            imported = 0
+            for values in rows:
+                if not any(value is not None for value in values):
+                    continue
+                row = dict(zip(header, values))
+                sr_no = row.get("Sr No")
+                self.append(row, sr_no=int(sr_no) if isinstance(sr_no, (int, float)) else None,
+                            duplicate_of=row.get(DUPLICATE_COLUMN))
+                imported += 1
+        finally:
+            wb.close()
+        return imported
+
+    def lock(self, excel_file):
+        # Serialises exports (and the one-time import) between processors sharing the workbook
+        return file_lock(excel_file + ".lock")
+
+    def export_excel(self, excel_file):
+        from openpyxl import Workbook
+        with self.lock(excel_file):
+            # Rows are read under the lock, so a slower exporter cannot replace a newer snapshot
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet()
+            ws.append(COLUMNS)
+            for row in self.rows():
+                ws.append([row.get(column, "") for column in COLUMNS])
+            # Write next to the target and swap it in, so readers never see a half-written workbook
+            tmp_file = f"{excel_file}.{os.getpid()}.tmp"
+            wb.save(tmp_file)
+            os.replace(tmp_file, excel_file)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,94 @@
+import re
+
+# Heading keyword -> section group (extends the notebook's Keywords list)
+HEADINGS = {
+    "education": "education",
+    "educational background": "education",
+    "academic profile": "education",
+    "academic qualification": "education",
+    "academic qualifications": "education",
+    "academics": "education",
+    "qualification": "education",
+    "qualifications": "education",
+    "experience": "experience",
+    "work experience": "experience",
+    "professional experience": "experience",
+    "employment history": "experience",
+    "employment": "experience",
+    "work history": "experience",
+    "work background": "experience",
+    "career history": "experience",
+    "internships": "experience",
+    "jobs": "experience",
+    "certifications": "courses",
+    "certificates": "courses",
+    "courses": "courses",
+    "professional courses": "courses",
+    "trainings": "courses",
+    "training": "courses",
+    "workshops": "courses",
+    "personal information": "personal",
+    "personal details": "personal",
+    "personal profile": "personal",
+    "personal data": "personal",
+    "contact": "personal",
+    "contact information": "personal",
+    "contact details": "personal",
+    "summary": "other",
+    "overview": "other",
+    "objective": "other",
+    "career objective": "other",
+    "executive profile": "other",
+    "professional profile": "other",
+    "skills": "other",
+    "technical skills": "other",
+    "projects": "other",
+    "achievements": "other",
+    "accomplishments": "other",
+    "publications": "other",
+    "publication": "other",
+    "position of responsibility": "other",
+    "other activities": "other",
+    "interests": "other",
+    "hobbies": "other",
+    "languages": "other",
+    "references": "other",
+}
+
+# One compiled alternation (longest keyword first) matched against heading-like lines only,
+# so every heading is found in a single scan of the text
+HEADING_RE = re.compile(
+    r"^[ \t]*(?:\d{1,2}[.)][ \t]*)?(?P<heading>"
+    + "|".join(re.escape(key) for key in sorted(HEADINGS, key=len, reverse=True))
+    + r")\b[ \t]*(?:[&/,-][ \t]*[A-Za-z ]{0,30})?[ \t]*:?[ \t\r]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Section groups that answer each column; "header" is the text before the first heading
+FIELD_SECTIONS = {
+    "Candidate Name & CNIC No": ("header", "personal"),
+    "Father's Name": ("header", "personal"),
+    "DOB": ("header", "personal"),
+    "SSC Field / %age": ("education",),
+    "HSSC Field / %age": ("education",),
+    "Graduation Field / CGPA / Passing Year": ("education",),
+    "Courses": ("courses", "education"),
+    "Experience Detail with Dates": ("experience",),
+    "Total Experience": ("experience",),
+    "Contact Number": ("header", "personal"),
+    "Email": ("header", "personal"),
+    "Address": ("header", "personal"),
+}
+
+
+def segment_sections(text):
+    """Return [(group, heading, start, end)] covering the text, starting with the header block."""
+    sections = []
+    group, heading, start = "header", "", 0
+    for match in HEADING_RE.finditer(text):
+        sections.append((group, heading, start, match.start()))
+        heading = match.group("heading")
+        group = HEADINGS[heading.lower()]
+        start = match.start()
+    sections.append((group, heading, start, len(text)))
+    return sections
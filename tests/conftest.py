@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmark import FakeLLM, generate_corpus  # noqa: E402
+from context_budget import TokenCounter  # noqa: E402
+
+
+def make_processor(app_name, workdir, llm=None, **kwargs):
+    """A CVProcessor of app.py or app_2.py on a scratch folder, answering through a FakeLLM."""
+    import importlib
+    module = importlib.import_module(app_name)
+    llm = llm or FakeLLM()
+
+    class TestProcessor(module.CVProcessor):
+        def load_llama_model(self, *args):
+            return llm
+
+        def load_token_counter(self):
+            return TokenCounter()
+
+    options = dict(
+        cv_folder=os.path.join(workdir, "cvs"),
+        archive_folder=os.path.join(workdir, "archive"),
+        output_file=os.path.join(workdir, "output.xlsx"),
+        db_file=os.path.join(workdir, "results.db"),
+        cache_file=os.path.join(workdir, "cv_cache.db"),
+        journal_folder=os.path.join(workdir, "journal"),
+        parse_workers=0,
+    )
+    if app_name == "app":
+        options.update(use_prefix_cache=False, constrain_output=False)
+    options.update(kwargs)
+    processor = TestProcessor(**options)
+    processor.fake_llm = llm
+    return processor
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    def build(size, seed=0):
+        generate_corpus(str(tmp_path / "cvs"), size, seed)
+        return str(tmp_path)
+    return build
@@ -0,0 +1,55 @@
+import os
+
+from cli import BatchProgress, run_batch
+from conftest import make_processor
+
+
+def test_batch_progress_counts_failed_cvs(capsys):
+    progress = BatchProgress(3, every=3600)
+    progress.observe_stage("write", "a.pdf", 0.1)
+    progress.observe_failure("parse", "b.pdf", ValueError("not a pdf"))
+    assert "1 done / 1 failed" not in capsys.readouterr().out  # throttled
+    progress.observe_stage("write", "c.pdf", 0.1)
+    # The last CV always reports, even though one of them failed
+    assert "2 done / 1 failed / 3 CVs" in capsys.readouterr().out
+    assert "ETA -" in progress.status()
+
+
+def test_run_batch_reports_failures(corpus, tmp_path, capsys):
+    workdir = corpus(2)
+    broken = os.path.join(workdir, "cvs", "broken.pdf")
+    with open(broken, "wb") as f:
+        f.write(b"not a pdf")
+    os.makedirs(tmp_path / "run")
+    processor = make_processor("app_2", str(tmp_path / "run"))
+    assert run_batch(processor, [os.path.join(workdir, "cvs")]) == 1
+    out = capsys.readouterr().out
+    assert "2 done / 1 failed / 3 CVs" in out
+    assert "2 processed, 1 failed" in out
+
+
+def test_health_creates_nothing(tmp_path, capsys):
+    import app_2
+    from cli import health
+    options = {"cv_folder": str(tmp_path / "cvs"), "archive_folder": str(tmp_path / "archive"),
+               "output_file": str(tmp_path / "output.xlsx"), "db_file": str(tmp_path / "results.db"),
+               "cache_file": str(tmp_path / "cv_cache.db"), "journal_folder": str(tmp_path / "journal"),
+               "ollama_url": "http://127.0.0.1:9"}
+    assert health(app_2.CVProcessor, options) == 1  # nothing listens on the discard port
+    assert os.listdir(tmp_path) == []
+    assert "not created yet" in capsys.readouterr().out
+
+
+def test_health_reads_an_existing_store_without_writing(corpus, capsys):
+    import app_2
+    from cli import health
+    workdir = corpus(2)
+    processor = make_processor("app_2", workdir)
+    processor.process_new_cvs()
+    processor.close()
+    before = {name: os.path.getmtime(os.path.join(workdir, name)) for name in ("output.xlsx", "results.db")}
+    health(app_2.CVProcessor, {"cv_folder": processor.cv_folder, "archive_folder": processor.archive_folder,
+                               "db_file": os.path.join(workdir, "results.db"),
+                               "journal_folder": processor.journal.folder, "ollama_url": "http://127.0.0.1:9"})
+    assert "results.db: 2 row(s)" in capsys.readouterr().out
+    assert before == {name: os.path.getmtime(os.path.join(workdir, name)) for name in before}
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from conftest import make_processor
+
+
+def pdfs(folder):
+    return sorted(f for f in os.listdir(folder) if f.endswith(".pdf"))
+
+
+@pytest.mark.parametrize("app_name", ["app", "app_2"])
+def test_crash_between_append_and_archive_resumes_without_duplicate(app_name, corpus, capsys):
+    workdir = corpus(3)
+    processor = make_processor(app_name, workdir)
+    archive_cv = processor.archive_cv
+    failed = []
+
+    def crash_once(file_path):
+        if not failed:
+            failed.append(file_path)
+            raise OSError("simulated crash before archiving")
+        archive_cv(file_path)
+
+    processor.archive_cv = crash_once
+    processor.process_new_cvs()
+    assert len(failed) == 1
+    assert processor.store.count() == 3
+    assert pdfs(processor.cv_folder) == [os.path.basename(failed[0])]
+    processor.store.close()
+
+    # Restart: the journal says the row is written, so it is archived without a new row or model call
+    restarted = make_processor(app_name, workdir)
+    capsys.readouterr()
+    restarted.process_new_cvs()
+    assert "Failed" not in capsys.readouterr().out
+    assert restarted.fake_llm.calls == 0
+    assert restarted.store.count() == 3
+    assert pdfs(restarted.cv_folder) == []
+    assert pdfs(restarted.archive_folder) == \
+        ["cv_00000.pdf", "cv_00001.pdf", "cv_00002.pdf"]
+    assert os.listdir(os.path.join(workdir, "journal")) == []
+
+
+@pytest.mark.parametrize("app_name", ["app", "app_2"])
+def test_single_call_skipped_when_only_total_experience_is_left(app_name, tmp_path):
+    from extraction_schema import FIELD_NAMES
+    processor = make_processor(app_name, str(tmp_path), extraction_mode="single_call")
+    answered = {field: "N/A" for field in FIELD_NAMES if field != "Total Experience"}
+    answered["Experience Detail with Dates"] = "Engineer, Acme (Jan 2019 - Dec 2020)"
+    info = processor.extract_info_with_llama("Ali Khan\nExperience\nEngineer", answered)
+    assert processor.fake_llm.calls == 0
+    assert info["Total Experience"] == "2 years"
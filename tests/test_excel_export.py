@@ -0,0 +1,44 @@
+import os
+import threading
+import time
+
+import pytest
+
+from conftest import make_processor
+from folder_watcher import inotify_available
+
+
+def count_exports(processor):
+    exports = []
+    export_excel = processor.export_excel
+
+    def counted():
+        exports.append(time.monotonic())
+        export_excel()
+
+    processor.export_excel = counted
+    return exports
+
+
+@pytest.mark.parametrize("app_name", ["app", "app_2"])
+def test_workbook_is_only_rebuilt_after_rows_were_written(app_name, tmp_path):
+    processor = make_processor(app_name, str(tmp_path))
+    exports = count_exports(processor)
+    with open(os.path.join(processor.cv_folder, "broken.pdf"), "wb") as f:
+        f.write(b"not a pdf")
+    processor.process_new_cvs()
+    assert exports == []
+
+
+@pytest.mark.skipif(not inotify_available(), reason="needs inotify")
+def test_watch_exports_once_per_burst(corpus):
+    processor = make_processor("app_2", corpus(3), interval=1)
+    exports = count_exports(processor)
+    threading.Thread(target=processor.watch, daemon=True).start()
+    deadline = time.monotonic() + 15
+    while not exports and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert processor.store.count() == 3
+    # Catch-up scans of an idle inbox write nothing, so they leave the workbook alone
+    time.sleep(2.5)
+    assert len(exports) == 1
@@ -0,0 +1,23 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from experience_dates import total_experience, total_experience_batch
+
+TODAY = date(2024, 6, 15)
+
+
+@pytest.mark.parametrize("detail, expected", [
+    ("Analyst, Jan 2019 - Dec 2020", "2 years"),
+    ("Engineer, Mar 2023 - Present", "1 year 4 months"),
+    # A reversed range or one starting in the future is a misreading, not zero months
+    ("Engineer, 2020 - 2018", None),
+    ("Lead, Jan 2026 - Present", None),
+    ("Analyst, Jan 2019 - Dec 2020; Lead, Jan 2026 - Present", "2 years"),
+    ("No dates here", None),
+])
+def test_total_experience_ignores_reversed_and_future_ranges(detail, expected):
+    assert total_experience(detail, TODAY) == expected
+    batch = total_experience_batch(pd.Series([detail]), TODAY)
+    assert (None if pd.isna(batch[0]) else batch[0]) == expected
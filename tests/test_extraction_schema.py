@@ -0,0 +1,20 @@
+import json
+
+from extraction_schema import parse_json_response
+
+
+def test_values_not_matching_the_schema_are_retried_not_coerced():
+    fields = ["DOB", "Courses", "Contact Number", "Email"]
+    raw = "Here you go: " + json.dumps({
+        "DOB": " 01/02/1990 ",
+        "Courses": ["Python", "SQL"],
+        "Contact Number": 3001234567,
+        "Extra": "ignored",
+    })
+    values, missing = parse_json_response(raw, fields)
+    assert values == {"DOB": "01/02/1990"}
+    assert missing == ["Courses", "Contact Number", "Email"]
+
+
+def test_unparseable_answer_retries_every_field():
+    assert parse_json_response("not json", ["DOB", "Email"]) == ({}, ["DOB", "Email"])
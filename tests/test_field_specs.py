@@ -0,0 +1,29 @@
+import pytest
+
+from benchmark import FakeLLM, FakeMessage
+from conftest import make_processor
+from field_specs import field_answer, output_limits
+
+
+class LeadingNewlineLLM(FakeLLM):
+    def invoke(self, prompt, **kwargs):
+        answer = super().invoke(prompt, **kwargs)
+        if isinstance(answer, FakeMessage):
+            return FakeMessage("\nAli Khan\nextra") if answer.content == "N/A" else answer
+        return "\nAli Khan\nextra" if answer == "N/A" else answer
+
+
+@pytest.mark.parametrize("app_name", ["app", "app_2"])
+def test_single_line_answer_starting_with_a_newline_keeps_its_content(app_name, corpus):
+    processor = make_processor(app_name, corpus(1), llm=LeadingNewlineLLM())
+    processor.process_new_cvs()
+    row = next(processor.store.rows())
+    assert row["SSC Field / %age"] == "Ali Khan"
+    assert row["Address"] == "Ali Khan"
+    assert "\n" not in output_limits("Address", 768)[1]
+
+
+def test_field_answer_skips_a_lead_in_line():
+    assert field_answer("SSC Field / %age", "Here is the SSC field:\nMatric Science 85%\n") == "Matric Science 85%"
+    assert field_answer("Courses", "Python\nSQL") == "Python\nSQL"
+    assert field_answer("Address", "   ") == ""
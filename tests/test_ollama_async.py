@@ -0,0 +1,67 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from conftest import make_processor
+from ollama_async import AsyncOllamaClient, BackgroundLoop, OllamaError
+from ollama_stub import make_server
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**options):
+        server = make_server(port=0, **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_address[1]}"
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_client_caps_requests_in_flight_and_closes(stub):
+    server, url = stub(latency=0.05, reply="ok")
+    client = AsyncOllamaClient("stub", url, max_in_flight=2)
+    loop = BackgroundLoop()
+
+    async def many():
+        return await asyncio.gather(*(client.chat_content([{"role": "user", "content": "hi"}]) for _ in range(8)))
+
+    assert loop.run(many()) == ["ok"] * 8
+    assert server.requests == 8
+    assert server.peak_in_flight == 2
+
+    loop.run(client.close())
+    loop.stop()
+    assert client.session is None
+    assert not loop.thread.is_alive() and loop.loop.is_closed()
+
+
+def test_client_retries_and_gives_up(stub):
+    _, url = stub(fail_rate=1.0)
+    client = AsyncOllamaClient("stub", url, retries=2, backoff=0.01)
+    loop = BackgroundLoop()
+    with pytest.raises(OllamaError, match="after 3 attempt"):
+        loop.run(client.chat([{"role": "user", "content": "hi"}]))
+    loop.run(client.close())
+    loop.stop()
+
+
+def test_async_processor_runs_against_stub_and_closes(stub, corpus):
+    server, url = stub(reply="N/A")
+    workdir = corpus(2)
+    processor = make_processor("app_2", workdir, async_llm=True, ollama_url=url, max_in_flight=2)
+    processor.process_new_cvs()
+
+    assert server.requests > 0
+    assert sorted(f for f in os.listdir(processor.archive_folder) if f.endswith(".pdf")) == ["cv_00000.pdf", "cv_00001.pdf"]
+    assert processor.fake_llm.calls == 0
+    clients, loop = processor.ollama_tiers, processor.ollama_loop
+    processor.close()
+    assert all(client.session is None for client in clients)
+    assert not loop.thread.is_alive()
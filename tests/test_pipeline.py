@@ -0,0 +1,14 @@
+from pipeline import process_pool, run_pipeline
+
+
+def test_parse_pool_does_not_fork_the_threaded_parent():
+    with process_pool(1) as pool:
+        assert pool._mp_context.get_start_method() != "fork"
+
+
+def test_pipeline_runs_items_through_a_parse_pool():
+    written = {}
+    errors = run_pipeline(["a", "bb", ""], parse=len, extract=lambda item, n: 1 // n,
+                          write=written.__setitem__, parse_workers=2)
+    assert written == {"a": 1, "bb": 0}
+    assert list(errors) == [""] and isinstance(errors[""], ZeroDivisionError)
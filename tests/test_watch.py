@@ -0,0 +1,32 @@
+import os
+import threading
+import time
+
+import pytest
+
+from conftest import make_processor
+from folder_watcher import inotify_available
+
+
+@pytest.mark.skipif(not inotify_available(), reason="needs inotify")
+def test_watch_retries_failed_cv_on_catch_up_scan(corpus):
+    workdir = corpus(1)
+    processor = make_processor("app_2", workdir, interval=1)
+    archive_cv = processor.archive_cv
+    failures = []
+
+    def fail_once(file_path):
+        if not failures:
+            failures.append(file_path)
+            raise OSError("archive share unavailable")
+        archive_cv(file_path)
+
+    processor.archive_cv = fail_once
+    threading.Thread(target=processor.watch, daemon=True).start()
+    archived = os.path.join(processor.archive_folder, "cv_00000.pdf")
+    deadline = time.monotonic() + 10
+    while not os.path.exists(archived) and time.monotonic() < deadline:
+        time.sleep(0.1)
+    # The failed CV raised no new event; only the periodic scan can have picked it up again
+    assert failures and os.path.exists(archived)
+    assert processor.store.count() == 1
@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+from conftest import make_processor
+
+
+@pytest.mark.parametrize("claim_work", [True, False])
+def test_failing_file_moves_to_failed_folder_after_max_attempts(corpus, claim_work):
+    workdir = corpus(1)
+    failed_folder = os.path.join(workdir, "failed")
+    processor = make_processor("app_2", workdir, claim_work=claim_work, max_attempts=3, failed_folder=failed_folder)
+    with open(os.path.join(processor.cv_folder, "broken.pdf"), "wb") as f:
+        f.write(b"not a pdf")
+
+    for attempt in range(3):
+        processor.process_new_cvs()
+        inbox = [name for name in os.listdir(processor.cv_folder) if name.endswith(".pdf")]
+        assert inbox == ([] if attempt == 2 else ["broken.pdf"])
+
+    assert os.listdir(failed_folder) == ["broken.pdf"]
+    assert sorted(f for f in os.listdir(processor.archive_folder) if f.endswith(".pdf")) == ["cv_00000.pdf"]
+    assert processor.store.count() == 1
+    # Nothing left to retry, and no failure counts kept for files that are done with
+    processor.process_new_cvs()
+    assert os.listdir(processor.failures.folder) == []
+    processor.close()
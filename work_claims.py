@@ -0,0 +1,202 @@
+import os
+import shutil
+import socket
+import threading
+import time
+
+IN_PROGRESS_DIR = ".inprogress"
+HEARTBEAT_FILE = ".heartbeat"
+# Failure count per file name, shared by the workers (outside IN_PROGRESS_DIR, which holds worker folders)
+ATTEMPTS_DIR = ".attempts"
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class FailureCounts:
+    """
+    Failure count per inbox file name, kept in cv_folder/.attempts so it survives restarts and is
+    shared by workers. A file failing `max_attempts` times is moved to `failed_folder`, so a corrupt
+    PDF is not re-parsed on every scan forever; drop the count with forget() once a file is done.
+    """
+
+    def __init__(self, cv_folder, max_attempts=3, failed_folder="failed"):
+        self.max_attempts = max_attempts
+        self.failed_folder = failed_folder
+        self.folder = os.path.join(cv_folder, ATTEMPTS_DIR)
+
+    def fail(self, path):
+        """Count a failure of the file at `path`; returns True if it may be retried, else moves it to failed_folder."""
+        name = os.path.basename(path)
+        attempts = self._count(name)
+        if attempts < self.max_attempts:
+            return True
+        os.makedirs(self.failed_folder, exist_ok=True)
+        try:
+            shutil.move(path, os.path.join(self.failed_folder, name))
+        except FileNotFoundError:
+            return False
+        self.forget(name)
+        print(f"🚫 {name} failed {attempts} time(s); moved to {self.failed_folder}")
+        return False
+
+    def forget(self, name):
+        # Drop the failure count once the file is done with (archived or given up on)
+        try:
+            os.remove(os.path.join(self.folder, name))
+        except FileNotFoundError:
+            pass
+
+    def _count(self, name):
+        # Only the worker holding the file (its claim, or the only processor) writes the count,
+        # so read-modify-write is safe
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, name)
+        try:
+            with open(path) as f:
+                attempts = int(f.read() or 0)
+        except (FileNotFoundError, ValueError):
+            attempts = 0
+        attempts += 1
+        with open(path, "w") as f:
+            f.write(str(attempts))
+        return attempts
+
+
+class WorkClaims:
+    """
+    Lease-based claiming of inbox files, so several processors can drain one cv_folder.
+
+    A file is claimed by renaming it into cv_folder/.inprogress/<worker_id>/; the rename is atomic
+    on one filesystem, so exactly one worker wins it. A background thread touches the worker's
+    heartbeat file every `heartbeat_interval` seconds. When a worker's heartbeat is older than
+    `lease_seconds` (it crashed or hung), any other worker moves its files back to the inbox.
+    Heartbeats are compared against the local clock, so keep node clocks roughly in sync.
+
+    A file that failed is handed back to the inbox for another attempt; once it has failed
+    `max_attempts` times it is moved to `failed_folder` instead (see FailureCounts), so a corrupt
+    PDF does not cycle between the inbox and the workers forever.
+    """
+
+    def __init__(self, cv_folder, worker_id=None, lease_seconds=600, heartbeat_interval=30, max_attempts=3,
+                 failed_folder="failed"):
+        self.cv_folder = cv_folder
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.failures = FailureCounts(cv_folder, max_attempts, failed_folder)
+        self.attempts_folder = self.failures.folder
+        self.root = os.path.join(cv_folder, IN_PROGRESS_DIR)
+        self.folder = os.path.join(self.root, self.worker_id)
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        # Files left behind by an earlier run under the same worker id go back to the inbox first
+        if os.path.isdir(self.folder):
+            for name in self._claimed_names(self.folder):
+                self._move_back(self.folder, name)
+        self.beat()
+        self.thread = threading.Thread(target=self._heartbeat_loop, name="claims-heartbeat", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        for name in self._claimed_names(self.folder):
+            self._move_back(self.folder, name)
+        self._remove_worker_folder(self.folder)
+
+    def beat(self):
+        os.makedirs(self.folder, exist_ok=True)  # recreated if our lease was taken over meanwhile
+        with open(os.path.join(self.folder, HEARTBEAT_FILE), "a"):
+            pass
+        os.utime(os.path.join(self.folder, HEARTBEAT_FILE))
+
+    def _heartbeat_loop(self):
+        while not self.stopped.wait(self.heartbeat_interval):
+            try:
+                self.beat()
+            except OSError as error:
+                print(f"⚠️ Heartbeat failed for {self.worker_id}: {error}")
+
+    def claim(self, name):
+        """Move `name` from the inbox into our in-progress folder; returns its new path, or None if another worker got it."""
+        target = os.path.join(self.folder, name)
+        try:
+            os.rename(os.path.join(self.cv_folder, name), target)
+        except FileNotFoundError:
+            return None
+        return target
+
+    def holds(self, path):
+        # False once an expired lease was taken over and the file moved back to the inbox
+        return os.path.exists(path)
+
+    def release(self, path):
+        """
+        Hand a claimed file back to the inbox after a failure, so it is retried; after max_attempts
+        failures it goes to failed_folder instead. Returns True if it went back to the inbox.
+        """
+        if not self.failures.fail(path):
+            return False
+        self._move_back(os.path.dirname(path), os.path.basename(path))
+        return True
+
+    def forget(self, name):
+        self.failures.forget(name)
+
+    def reclaim_expired(self):
+        """Move files of workers whose heartbeat expired back to the inbox; returns how many were moved."""
+        try:
+            workers = os.listdir(self.root)
+        except FileNotFoundError:
+            return 0
+        moved = 0
+        now = time.time()
+        for worker in workers:
+            folder = os.path.join(self.root, worker)
+            if worker == self.worker_id or not os.path.isdir(folder):
+                continue
+            try:
+                last_beat = os.path.getmtime(os.path.join(folder, HEARTBEAT_FILE))
+            except FileNotFoundError:
+                try:
+                    last_beat = os.path.getmtime(folder)
+                except FileNotFoundError:
+                    continue
+            if now - last_beat < self.lease_seconds:
+                continue
+            names = self._claimed_names(folder)
+            for name in names:
+                moved += self._move_back(folder, name)
+            if names:
+                print(f"♻️ Reclaimed {len(names)} CV(s) from expired worker {worker}")
+            self._remove_worker_folder(folder)
+        return moved
+
+    def _claimed_names(self, folder):
+        try:
+            return [name for name in os.listdir(folder) if name != HEARTBEAT_FILE]
+        except FileNotFoundError:
+            return []
+
+    def _move_back(self, folder, name):
+        try:
+            os.rename(os.path.join(folder, name), os.path.join(self.cv_folder, name))
+        except FileNotFoundError:
+            return 0  # another worker reclaimed it first
+        return 1
+
+    def _remove_worker_folder(self, folder):
+        try:
+            os.remove(os.path.join(folder, HEARTBEAT_FILE))
+        except FileNotFoundError:
+            pass
+        try:
+            os.rmdir(folder)
+        except OSError:
+            pass  # not empty (the worker came back and claimed more) or already gone